@@ -1,15 +1,18 @@
 import os
+import sys
 import time
 import random
 import re
 from datetime import timedelta
 from typing import Dict, Any, List, Optional, Tuple, Set
 import pandas as pd
-import geopandas as gpd
 from shapely.geometry import Point
 from geopy.distance import geodesic
 import googlemaps
 from dotenv import load_dotenv
+# Shared country boundaries live in boundary_store.py at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from boundary_store import get_country_boundary
 
 # === CONFIGURATION ===
 load_dotenv()
@@ -31,7 +34,6 @@ COUNTRY_DIR = "AGO"
 BASE_DIR = "C:/Users/myuan/Desktop/VetMap_Data"
 SHP_DIR = "C:/Users/myuan/Desktop/Data/shapefile/country"
 
-COUNTRY_SHP_PATH = os.path.join(SHP_DIR, COUNTRY_DIR, "AGO1_nr.shp") 
 SEARCH_RADIUS = 10000  # in meters
 GRID_SPACING_KM = 10  # grid spacing in kilometers
 LANGUAGE = "en"               # response language
@@ -87,17 +89,11 @@ def backoff_sleep(attempt: int, base: float = 0.8, cap: float = 10.0):
 # === GEOMETRY & GRID  ===
 # =========================
 
-def load_country_polygon(shp_path: str):
+def load_country_polygon(iso: str):
     """
-    Load shapefile and return a unified polygon in EPSG:4326.
-    Uses union_all() for widest Shapely compatibility.
+    Return the unified, prepared country polygon in EPSG:4326 from the shared boundary store.
     """
-    gdf = gpd.read_file(shp_path).to_crs(epsg=4326)
-    try:
-        polygon = gdf.geometry.union_all()
-    except Exception:
-        polygon = gdf.union_all()
-    return polygon
+    return get_country_boundary(iso, SHP_DIR).geometry
 
 def generate_grid_in_shape(polygon, spacing_km: float = 10.0) -> List[Tuple[float, float]]:
     """
@@ -221,7 +217,7 @@ def scrape_vet_clinics_with_resume():
     start_time = time.time()
 
     print(f"Loading country polygon for: {COUNTRY_DIR}")
-    polygon = load_country_polygon(COUNTRY_SHP_PATH)
+    polygon = load_country_polygon(COUNTRY_DIR)
 
     print("Generating grid points ...")
     grid_points = generate_grid_in_shape(polygon, spacing_km=GRID_SPACING_KM)
@@ -1,11 +1,14 @@
-import geopandas as gpd
 from shapely.geometry import box
 import pandas as pd
 import time
 from datetime import timedelta
 import os
+import sys
 import requests
 import random
+# Shared country boundaries live in boundary_store.py at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from boundary_store import get_country_boundary
 
 # === CONFIGURATION ===
 load_dotenv()
@@ -15,7 +18,6 @@ BASE_DIR = "C:/Users/myuan/Desktop/VetMap_Data"
 SHP_DIR = "C:/Users/myuan/Desktop/Data/shapefile/country"
 
 # Input files
-COUNTRY_SHP_PATH = os.path.join(SHP_DIR, COUNTRY_DIR, f"{COUNTRY_DIR}1_nr.shp")
 TILE_SIZE_DEG = 0.25   
 
 # Output files — keep separate
@@ -75,8 +77,7 @@ def OSM_Place():
 
     # 1) Load country shapefile and unify geometry (WGS84)
     print(f"🔍 Loading shapefile for country: {COUNTRY_DIR}")
-    gdf = gpd.read_file(COUNTRY_SHP_PATH).to_crs(epsg=4326)
-    polygon = gdf.geometry.union_all()
+    polygon = get_country_boundary(COUNTRY_DIR, SHP_DIR).geometry
 
     # 2) Build bounding box tiles
     minx, miny, maxx, maxy = polygon.bounds
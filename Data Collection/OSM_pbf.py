@@ -2,6 +2,13 @@ import osmium
 import pandas as pd
 import geopandas as gpd
 import os
+import sys
+import json
+import requests
+from datetime import datetime
+# Shared country boundaries live in boundary_store.py at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from boundary_store import get_country_boundary
 
 # === CONFIGURATION ===
 BASE_DIR = "C:/Users/myuan/Desktop/VetMap_Data"
@@ -10,6 +17,18 @@ SHP_DIR = "C:/Users/myuan/Desktop/Data/shapefile/country"
 OSM_PBF_PATH = "C:/Users/myuan/Downloads/asia-latest.osm.pbf"  
 # Select continent here
 CONTINENT = "ASIA"
+# "full" re-parses OSM_PBF_PATH, "incremental" applies replication diffs to the saved state
+UPDATE_MODE = "full"
+# Replication source matching the PBF extract: a Geofabrik updates URL or a local folder
+# laid out the same way (state.txt + AAA/BBB/CCC.osc.gz)
+REPLICATION_BASE = "https://download.geofabrik.de/asia-updates"
+STATE_DIR = os.path.join(BASE_DIR, "OSM_state")
+STATE_CSV = os.path.join(STATE_DIR, f"{CONTINENT}_vets.csv")
+STATE_JSON = os.path.join(STATE_DIR, f"{CONTINENT}_state.json")
+# Locations of the nodes of veterinary ways, so diffs that move a node or add a way
+# whose nodes are not in the diff can still be placed
+NODE_LOCATIONS_CSV = os.path.join(STATE_DIR, f"{CONTINENT}_way_nodes.csv")
+DIFF_CACHE_DIR = os.path.join(STATE_DIR, "diffs")
 # === ISO sets by continent ===
 EUROPE_ISO = {
     "ALB","AND","AUT","BEL","BGR","BIH","CHE","CYP","CZE","DEU","DNK","ESP","EST","FIN","FRA",
@@ -58,10 +77,22 @@ CONTINENT_MAP = {
 ISO_SET = CONTINENT_MAP[CONTINENT]
 
 # === HANDLER ===
+def parse_refs(text):
+    """Node ids of a way from the space-separated way_nodes column."""
+    return [int(ref) for ref in text.split()] if isinstance(text, str) else []
+
+def way_centroid(refs, node_locations):
+    """Mean of the known node locations (closed ways count their first node twice, as in the full run)."""
+    locs = [node_locations[ref] for ref in refs if ref in node_locations]
+    if not locs:
+        return None, None
+    return sum(l[0] for l in locs) / len(locs), sum(l[1] for l in locs) / len(locs)
+
 class VetHandler(osmium.SimpleHandler):
     def __init__(self):
         super().__init__()
         self.rows = []
+        self.node_locations = {}  # node id → (lat, lon) for the nodes of veterinary ways
 
     def node(self, n):
         if 'amenity' in n.tags and n.tags['amenity'] == 'veterinary':
@@ -71,12 +102,12 @@ class VetHandler(osmium.SimpleHandler):
 
     def way(self, w):
         if 'amenity' in w.tags and w.tags['amenity'] == 'veterinary':
-            if w.nodes:
-                lat = sum(n.lat for n in w.nodes if n.location) / len(w.nodes)
-                lon = sum(n.lon for n in w.nodes if n.location) / len(w.nodes)
-            else:
-                lat, lon = None, None
-            self.rows.append(self._make_entry("way", w.id, w.tags, lat, lon))
+            refs = [n.ref for n in w.nodes]
+            self.node_locations.update({n.ref: (n.lat, n.lon) for n in w.nodes if n.location.valid()})
+            lat, lon = way_centroid(refs, self.node_locations)
+            entry = self._make_entry("way", w.id, w.tags, lat, lon)
+            entry["way_nodes"] = " ".join(map(str, refs))
+            self.rows.append(entry)
 
     def relation(self, r):
         if 'amenity' in r.tags and r.tags['amenity'] == 'veterinary':
@@ -101,6 +132,161 @@ class VetHandler(osmium.SimpleHandler):
         ]
         return ", ".join([p for p in parts if p])
 
+class VetChangeHandler(VetHandler):
+    """
+    Reads an OSM change file (.osc) and records, per osm_id, either the new entry
+    or None when the object was deleted or is no longer amenity=veterinary.
+    Way centroids are left empty here: a diff only holds the nodes that changed,
+    so they are computed once all diffs are applied. node_locations collects the
+    diff's locations for the nodes of veterinary ways (tracked_nodes: the nodes
+    of the ways already known).
+    """
+    def __init__(self, known_ids, tracked_nodes):
+        super().__init__()
+        self.known_ids = known_ids
+        self.tracked_nodes = tracked_nodes
+        self.changes = {}
+
+    def _record(self, obj_type, obj, lat, lon):
+        osm_id = f"{obj_type}/{obj.id}"
+        if not obj.deleted and obj.tags.get("amenity") == "veterinary":
+            self.changes[osm_id] = self._make_entry(obj_type, obj.id, obj.tags, lat, lon)
+        elif osm_id in self.known_ids or osm_id in self.changes:
+            self.changes[osm_id] = None
+
+    def node(self, n):
+        valid = not n.deleted and n.location.valid()
+        if valid and n.id in self.tracked_nodes:
+            self.node_locations[n.id] = (n.location.lat, n.location.lon)  # moved node of a known way
+        self._record("node", n, n.location.lat if valid else None, n.location.lon if valid else None)
+
+    def way(self, w):
+        self._record("way", w, None, None)
+        entry = self.changes.get(f"way/{w.id}")
+        if entry is not None:
+            entry["way_nodes"] = " ".join(str(n.ref) for n in w.nodes)
+            self.node_locations.update({n.ref: (n.lat, n.lon) for n in w.nodes if n.location.valid()})
+
+class NodeLocationLookup(osmium.SimpleHandler):
+    """Locations of the given node ids, read from a PBF extract (only its nodes are parsed)."""
+    def __init__(self, node_ids):
+        super().__init__()
+        self.wanted = set(node_ids)
+        self.found = {}
+
+    def node(self, n):
+        if n.id in self.wanted and n.location.valid():
+            self.found[n.id] = (n.location.lat, n.location.lon)
+
+    def relation(self, r):
+        self._record("relation", r, None, None)
+
+# === COUNTRY HELPERS ===
+def load_country_polygons():
+    polygons = {}
+    for iso in sorted(ISO_SET):
+        try:
+            polygons[iso] = get_country_boundary(iso, SHP_DIR).geometry
+        except FileNotFoundError:
+            print(f"⏭️ Skipping {iso} (no shapefile found)")
+    return polygons
+
+def assign_countries(df, polygons):
+    """Return a Series with the first country (sorted ISO order) containing each row."""
+    country = pd.Series(pd.NA, index=df.index, dtype="object")
+    df_coords = df.dropna(subset=["latitude", "longitude"])
+    if df_coords.empty:
+        return country
+    points = gpd.GeoSeries(gpd.points_from_xy(df_coords["longitude"], df_coords["latitude"]), 
+                           index=df_coords.index, crs="EPSG:4326")
+    for iso, poly in polygons.items():
+        unassigned = country.loc[points.index].isna()
+        inside = points[unassigned.values].within(poly)
+        country.loc[inside[inside].index] = iso
+    return country
+
+def write_country_csv(df_country, iso):
+    output_file = os.path.join(BASE_DIR, iso, "OSM", f"{iso}_VP_OSM.csv")
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    # Deduplicate
+    df_out = df_country.drop_duplicates(subset=["osm_id"])
+    df_out = df_out[["name", "address", "latitude", "longitude", "website"]]
+    df_out.columns = [c.capitalize() for c in df_out.columns]
+    df_out[["Name", "Address"]] = df_out[["Name", "Address"]].replace(r"^\s*$", pd.NA, regex=True)
+    df_out = df_out.dropna(subset=["Name", "Address"], how="all")
+
+    # Save
+    df_out.to_csv(output_file, index=False)
+    print(f"💾 {iso}: {len(df_out)} vet clinics saved to {output_file}")
+    return len(df_out)
+
+# === REPLICATION STATE ===
+def read_pbf_sequence(pbf_path):
+    reader = osmium.io.Reader(pbf_path, osmium.osm.osm_entity_bits.NOTHING)
+    try:
+        seq = reader.header().get("osmosis_replication_sequence_number")
+    finally:
+        reader.close()
+    return int(seq) if seq else None
+
+def save_state(state_df, sequence, node_locations):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    state_df.to_csv(STATE_CSV, index=False)
+    # Only the nodes of the ways in the state are kept
+    refs = {ref for text in state_df.get("way_nodes", pd.Series(dtype=object)) for ref in parse_refs(text)}
+    nodes = pd.DataFrame([(ref, *node_locations[ref]) for ref in refs if ref in node_locations],
+                         columns=["node_id", "lat", "lon"])
+    nodes.to_csv(NODE_LOCATIONS_CSV, index=False)
+    with open(STATE_JSON, "w", encoding="utf-8") as f:
+        json.dump({"sequence": sequence, "updated": datetime.now().isoformat(timespec="seconds")}, f)
+
+def load_state():
+    if not (os.path.exists(STATE_CSV) and os.path.exists(STATE_JSON)):
+        return None, None
+    with open(STATE_JSON, encoding="utf-8") as f:
+        sequence = json.load(f).get("sequence")
+    state_df = pd.read_csv(STATE_CSV, dtype={"country": "object", "way_nodes": "object"})
+    if "way_nodes" not in state_df.columns:  # state saved before node tracking: positions of ways cannot be updated
+        state_df["way_nodes"] = None
+    return state_df, sequence
+
+def load_node_locations():
+    if not os.path.exists(NODE_LOCATIONS_CSV):
+        return {}
+    nodes = pd.read_csv(NODE_LOCATIONS_CSV)
+    return dict(zip(nodes["node_id"], zip(nodes["lat"], nodes["lon"])))
+
+def replication_path(sequence):
+    seq = f"{sequence:09d}"
+    return f"{seq[0:3]}/{seq[3:6]}/{seq[6:9]}.osc.gz"
+
+def read_replication_file(rel_path):
+    """Return the local path of a replication file, downloading it if the base is a URL."""
+    if not REPLICATION_BASE.startswith(("http://", "https://")):
+        return os.path.join(REPLICATION_BASE, rel_path)
+    local_path = os.path.join(DIFF_CACHE_DIR, rel_path)
+    if not os.path.exists(local_path):
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        r = requests.get(f"{REPLICATION_BASE.rstrip('/')}/{rel_path}", timeout=120)
+        r.raise_for_status()
+        with open(local_path, "wb") as f:
+            f.write(r.content)
+    return local_path
+
+def latest_sequence():
+    if REPLICATION_BASE.startswith(("http://", "https://")):
+        r = requests.get(f"{REPLICATION_BASE.rstrip('/')}/state.txt", timeout=30)
+        r.raise_for_status()
+        text = r.text
+    else:
+        with open(os.path.join(REPLICATION_BASE, "state.txt"), encoding="utf-8") as f:
+            text = f.read()
+    for line in text.splitlines():
+        if line.startswith("sequenceNumber="):
+            return int(line.split("=", 1)[1])
+    raise ValueError("No sequenceNumber found in replication state.txt")
+
 # === MAIN ===
 def extract_vets_by_country():
     print(f"🔍 Reading PBF extract: {OSM_PBF_PATH}")
@@ -112,57 +298,107 @@ def extract_vets_by_country():
     if df.empty:
         print("⚠️ No vet entries found in this PBF.")
         return
+    df = df.drop_duplicates(subset=["osm_id"])
+
+    polygons = load_country_polygons()
+    df["country"] = assign_countries(df, polygons)
 
     summary = {}  # store counts for each country
-    # Add country column based on shapefile check
-    for iso in sorted(ISO_SET):
-        shp_folder = os.path.join(SHP_DIR, iso)
-        if not os.path.isdir(shp_folder):
-            print(f"⏭️ Skipping {iso} (no shapefile folder found)")
-            continue
-        # Spatial filter using shapefile
-        shp_path = os.path.join(shp_folder, f"{iso}1_nr.shp")
-        if not os.path.exists(shp_path):
-            print(f"⏭️ Skipping {iso} (no shapefile file found)")
-            continue
-        
-        output_file = os.path.join(BASE_DIR, iso, "OSM", f"{iso}_VP_OSM.csv")
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-
-        country_gdf = gpd.read_file(shp_path).to_crs(epsg=4326)
-        poly = country_gdf.geometry.union_all()
-
-        # Keep only rows with valid coordinates
-        df_coords = df.dropna(subset=["latitude", "longitude"])
-
-        # Build GeoDataFrame correctly
-        gdf_points = gpd.GeoDataFrame(
-            df_coords,
-            geometry=gpd.points_from_xy(df_coords["longitude"], df_coords["latitude"]),
-            crs="EPSG:4326"
-        )
-
-        inside = gdf_points[gdf_points.within(poly)]
-        df_out = inside.drop(columns="geometry")
-
-        # Deduplicate
-        df_out = df_out.drop_duplicates(subset=["osm_id"])
-        df_out = df_out[["name", "address", "latitude", "longitude", "website"]]
-        df_out.columns = [c.capitalize() for c in df_out.columns]
-        df_out[["Name", "Address"]] = df_out[["Name", "Address"]].replace(r"^\s*$", pd.NA, regex=True)
-        df_out = df_out.dropna(subset=["Name", "Address"], how="all")
-
-        # Save
-        df_out.to_csv(output_file, index=False)
-        count = len(df_out)
-        summary[iso] = count
-        print(f"💾 {iso}: {len(df_out)} vet clinics saved to {output_file}")
+    for iso in polygons:
+        summary[iso] = write_country_csv(df[df["country"] == iso], iso)
+
+    # Keep the extracted state so later runs can apply replication diffs
+    sequence = read_pbf_sequence(OSM_PBF_PATH)
+    if sequence is not None:
+        save_state(df, sequence, handler.node_locations)
+        print(f"🗂️ State saved at replication sequence {sequence}: {STATE_CSV}")
+    else:
+        print("⚠️ PBF header has no replication sequence number; incremental mode unavailable.")
 
     # Print summary
     print(f"\n📊 Summary of {CONTINENT} countries processed:")
     for iso, count in summary.items():
         print(f"{iso}: {count} clinics")
 
+def update_vets_incremental():
+    state_df, sequence = load_state()
+    if state_df is None or sequence is None:
+        print("⚠️ No saved state found. Run with UPDATE_MODE = 'full' first.")
+        return
+
+    latest = latest_sequence()
+    if latest <= sequence:
+        print(f"✅ State already at latest sequence {sequence}.")
+        return
+    print(f"🔄 Applying replication diffs {sequence + 1}..{latest}")
+
+    state = state_df.set_index("osm_id", drop=False)
+    node_locations = load_node_locations()
+    tracked_nodes = {ref for text in state["way_nodes"] for ref in parse_refs(text)}
+    changed = {}
+    diff_locations = {}
+    for seq in range(sequence + 1, latest + 1):
+        handler = VetChangeHandler(set(state.index) | set(changed), tracked_nodes)
+        handler.apply_file(read_replication_file(replication_path(seq)), locations=True)
+        changed.update(handler.changes)
+        diff_locations.update(handler.node_locations)
+        tracked_nodes |= {ref for entry in handler.changes.values() if entry for ref in parse_refs(entry.get("way_nodes"))}
+        print(f"   → sequence {seq}: {len(handler.changes)} veterinary objects changed")
+    node_locations.update(diff_locations)
+
+    # Known ways that did not change themselves but had a node moved get a new centroid too
+    for osm_id, text in state["way_nodes"].items():
+        if osm_id not in changed and any(ref in diff_locations for ref in parse_refs(text)):
+            changed[osm_id] = state.loc[osm_id].drop("country").to_dict()
+
+    if not changed:
+        save_state(state_df, latest, node_locations)
+        print(f"✅ No veterinary changes. State moved to sequence {latest}.")
+        return
+
+    # Way centroids from the diff nodes and the stored node locations; nodes found in
+    # neither (a way newly tagged as a vet) are looked up in the last full extract
+    way_ids = [osm_id for osm_id, entry in changed.items() if entry is not None and osm_id.startswith("way/")]
+    missing = {ref for osm_id in way_ids for ref in parse_refs(changed[osm_id]["way_nodes"]) if ref not in node_locations}
+    if missing and os.path.exists(OSM_PBF_PATH):
+        print(f"🔎 Looking up {len(missing)} way node locations in {OSM_PBF_PATH}")
+        lookup = NodeLocationLookup(missing)
+        lookup.apply_file(OSM_PBF_PATH)
+        node_locations.update(lookup.found)
+    for osm_id in way_ids:
+        changed[osm_id]["latitude"], changed[osm_id]["longitude"] = way_centroid(parse_refs(changed[osm_id]["way_nodes"]), node_locations)
+
+    # Countries touched before the update
+    affected = set(state.loc[state.index.intersection(list(changed)), "country"].dropna())
+
+    deleted_ids = [osm_id for osm_id, entry in changed.items() if entry is None]
+    state = state.drop(index=state.index.intersection(deleted_ids))
+
+    upserts = pd.DataFrame([entry for entry in changed.values() if entry is not None])
+    if not upserts.empty:
+        upserts = upserts.set_index("osm_id", drop=False)
+        # Ways whose nodes are not part of the diff keep their previous position
+        previous = state.reindex(upserts.index)
+        for col in ["latitude", "longitude"]:
+            upserts[col] = upserts[col].fillna(previous[col])
+        upserts["country"] = assign_countries(upserts, load_country_polygons())
+        unplaced = upserts.index[upserts["latitude"].isna() | upserts["longitude"].isna()]
+        if len(unplaced):
+            print(f"⚠️ {len(unplaced)} changed vets have no location and are left out of the country CSVs "
+                  f"until the next full run: {', '.join(unplaced[:20])}{' ...' if len(unplaced) > 20 else ''}")
+        affected |= set(upserts["country"].dropna())
+        state = pd.concat([state.drop(index=state.index.intersection(upserts.index)), upserts])
+
+    state = state.reset_index(drop=True)
+    for iso in sorted(affected):
+        write_country_csv(state[state["country"] == iso], iso)
+
+    save_state(state, latest, node_locations)
+    print(f"\n📊 {len(changed)} objects changed, {len(affected)} countries rewritten: {', '.join(sorted(affected))}")
+
 
 if __name__ == "__main__":
-    extract_vets_by_country()
+    if UPDATE_MODE == "incremental":
+        update_vets_incremental()
+    else:
+        extract_vets_by_country()
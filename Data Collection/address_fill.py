@@ -1,21 +1,56 @@
-limport pandas as pd
+import pandas as pd
 import requests
 import time
 import os
+import sys
+import csv
+import threading
+import concurrent.futures
+from dotenv import load_dotenv
+from address_index import load_or_build_index
+# Shared rate limiter lives in rate_limiter.py at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rate_limiter import RateLimiter
 
 # === CONFIGURATION ===
 BASE_DIR = r"C:\Users\myuan\Desktop\VetMap_Data"   # root folder with ISO subfolders
 load_dotenv()
 USER_AGENT = os.getenv("OSM_USER_AGENT")  # required by Nominatim
-SLEEP_SECONDS = 1  # Nominatim limit = 1 request/sec
+# Public Nominatim allows 1 request/sec; a self-hosted container can take far more
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
+REQUESTS_PER_SECOND = float(os.getenv("NOMINATIM_RPS", "1"))  # shared by all files
+MAX_FILE_WORKERS = 4  # files processed concurrently
+SAVE_INTERVAL = 25  # Nominatim lookups between incremental saves of a file
+MAX_RETRIES = 3
+# Local reverse geocoding from the PBF extracts already downloaded for OSM_pbf.py
+OSM_PBF_PATHS = [
+    "C:/Users/myuan/Downloads/europe-latest.osm.pbf",
+    "C:/Users/myuan/Downloads/asia-latest.osm.pbf",
+]
+ADDRESS_INDEX_PATH = os.path.join(BASE_DIR, "OSM_state", "address_index.npz")
+LOCAL_MAX_DISTANCE_METERS = 75  # farther than this → fall back to Nominatim
+# Nominatim answers shared by all *_VP_OSM.csv files and reruns
+CACHE_PATH = os.path.join(BASE_DIR, "OSM_state", "reverse_geocode_cache.csv")
+CACHE_PRECISION = 5  # decimals of lat/lon used as cache key (5 ≈ 1 m)
 
 # === REVERSE GEOCODING ===
+rate_limiter = RateLimiter(REQUESTS_PER_SECOND)
+
 def reverse_geocode(lat, lon):
-    url = "https://nominatim.openstreetmap.org/reverse"
+    url = f"{NOMINATIM_URL.rstrip('/')}/reverse"
     params = {"lat": lat, "lon": lon, "format": "jsonv2", "addressdetails": 1}
     try:
-        r = requests.get(url, params=params, headers={"User-Agent": USER_AGENT}, timeout=10)
+        for attempt in range(MAX_RETRIES):
+            rate_limiter.wait()
+            r = requests.get(url, params=params, headers={"User-Agent": USER_AGENT}, timeout=10)
+            if r.status_code != 429:
+                break
+            # Rate limited: wait as told (or back off) before trying again
+            wait = float(r.headers.get("Retry-After", 5 * (attempt + 1)))
+            print(f"⏳ Rate limited at {lat}, {lon}; waiting {wait:.0f}s")
+            time.sleep(wait)
         if r.status_code == 200:
+            # "" means Nominatim answered without an address; None means the request failed
             data = r.json().get("address", {})
             return ", ".join(filter(None, [
                 data.get("road"),
@@ -28,8 +63,47 @@ def reverse_geocode(lat, lon):
         print(f"⚠️ Error at {lat}, {lon}: {e}")
     return None
 
+# === REVERSE GEOCODING CACHE ===
+def cache_key(lat, lon):
+    return (round(float(lat), CACHE_PRECISION), round(float(lon), CACHE_PRECISION))
+
+class ReverseGeocodeCache:
+    """
+    Append-only CSV of Nominatim answers keyed by rounded (lat, lon).
+    An empty address is a cached negative result and is not requested again.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            cached = pd.read_csv(path, keep_default_na=False, dtype={"address": str})
+            for lat, lon, address in zip(cached["lat"], cached["lon"], cached["address"]):
+                self.entries[cache_key(lat, lon)] = address
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(["lat", "lon", "address"])
+        print(f"🗃️ Reverse geocoding cache: {len(self.entries)} entries")
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, address):
+        with self.lock:
+            self.entries[key] = address
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow([key[0], key[1], address])
+
+def save_csv(df, csv_path):
+    # Write to a temporary file first so an interrupted save never truncates the CSV
+    tmp_path = csv_path + ".tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, csv_path)
+
 # === PROCESS A SINGLE FILE ===
-def process_csv(csv_path):
+def process_csv(csv_path, address_index=None, cache=None):
+    tag = os.path.basename(csv_path).split("_")[0]
     print(f"\n🔍 Processing {csv_path}")
     df = pd.read_csv(csv_path)
 
@@ -38,30 +112,81 @@ def process_csv(csv_path):
         return
 
     missing_mask = df["Address"].isna() | df["Address"].astype(str).str.strip().eq("")
-    print(f"   → {missing_mask.sum()} rows missing addresses")
-
-    for idx, row in df[missing_mask].iterrows():
-        lat, lon = row["Latitude"], row["Longitude"]
-        if pd.notna(lat) and pd.notna(lon):
-            addr = reverse_geocode(lat, lon)
-            if addr:
-                df.at[idx, "Address"] = addr
-                print(f"   ✅ Row {idx} filled: {addr}")
-            else:
-                print(f"   ⚠️ Row {idx}: no address found")
-            time.sleep(SLEEP_SECONDS)
-
-    # Save updated file (overwrite)
-    df.to_csv(csv_path, index=False)
+    print(f"   {tag} → {missing_mask.sum()} rows missing addresses")
+
+    to_fill = df[missing_mask].dropna(subset=["Latitude", "Longitude"])
+    keys = [cache_key(lat, lon) for lat, lon in zip(to_fill["Latitude"], to_fill["Longitude"])]
+    rows_by_key = {}
+    for idx, key in zip(to_fill.index, keys):
+        rows_by_key.setdefault(key, []).append(idx)
+
+    def fill(key, address):
+        if address:
+            df.loc[rows_by_key[key], "Address"] = address
+            return len(rows_by_key[key])
+        return 0
+
+    # Resolve each distinct coordinate once: cache → local index → Nominatim
+    pending = list(dict.fromkeys(keys))
+    resolved = {}
+    if cache is not None:
+        for key in pending:
+            address = cache.get(key)
+            if address is not None:
+                resolved[key] = address
+        pending = [key for key in pending if key not in resolved]
+    print(f"   {tag} → {len(rows_by_key)} distinct coordinates, {len(resolved)} answered from cache")
+
+    # Batched lookup in the local index; only far-away points go to Nominatim
+    if address_index is not None and pending:
+        lats, lons = zip(*pending)
+        addresses, distances = address_index.lookup(lats, lons)
+        local_ok = (distances <= LOCAL_MAX_DISTANCE_METERS) & (addresses != "")
+        for key, address, ok in zip(pending, addresses, local_ok):
+            if ok:
+                resolved[key] = address
+        print(f"   {tag} 📇 {local_ok.sum()} coordinates filled from local index, {(~local_ok).sum()} left for Nominatim")
+        pending = [key for key in pending if key not in resolved]
+
+    filled = sum(fill(key, address) for key, address in resolved.items())
+    if pending and filled:
+        save_csv(df, csv_path)
+
+    # Nominatim: the file is saved every SAVE_INTERVAL lookups, so an interrupted
+    # run resumes with only the rows that are still missing
+    for n, key in enumerate(pending, start=1):
+        addr = reverse_geocode(*key)
+        if addr is not None and cache is not None:
+            cache.put(key, addr)
+        filled += fill(key, addr)
+        print(f"   {tag} ✅ {key} filled: {addr}" if addr else f"   {tag} ⚠️ {key}: no address found")
+        if n % SAVE_INTERVAL == 0:
+            save_csv(df, csv_path)
+            print(f"   {tag} 💾 Progress saved ({n}/{len(pending)} lookups)")
+
+    print(f"   {tag} → {filled} rows filled")
+    save_csv(df, csv_path)
     print(f"💾 Saved updates to {csv_path}")
 
 # === WALK THROUGH ALL SUBFOLDERS ===
 def process_all():
+    address_index = load_or_build_index(ADDRESS_INDEX_PATH, OSM_PBF_PATHS)
+    cache = ReverseGeocodeCache(CACHE_PATH)
+    csv_paths = []
     for root, _, files in os.walk(BASE_DIR):
         for file in files:
             if file.endswith("_VP_OSM.csv") and len(file.split("_")[0]) == 3:
-                csv_path = os.path.join(root, file)
-                process_csv(csv_path)
+                csv_paths.append(os.path.join(root, file))
+
+    # Files run concurrently; Nominatim requests share one global rate limit
+    print(f"🌐 {NOMINATIM_URL} at {REQUESTS_PER_SECOND} req/s, {len(csv_paths)} files, {MAX_FILE_WORKERS} workers")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_FILE_WORKERS) as executor:
+        futures = {executor.submit(process_csv, path, address_index, cache): path for path in csv_paths}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"❌ Failed {futures[future]}: {e}")
 
 if __name__ == "__main__":
     process_all()
@@ -0,0 +1,121 @@
+import os
+from array import array
+import numpy as np
+import osmium
+from sklearn.neighbors import BallTree
+
+# === CONFIGURATION ===
+EARTH_RADIUS_METERS = 6371000
+ADDRESS_FIELDS = ["street", "housenumber", "postcode", "city"]
+
+# === PBF HANDLER ===
+class AddressHandler(osmium.SimpleHandler):
+    """
+    Collects every node/way carrying addr:street or addr:housenumber.
+    Coordinates are kept as float32 and text fields as integer codes into
+    per-field vocabularies, so continent extracts stay small in memory.
+    """
+    def __init__(self):
+        super().__init__()
+        self.lat = array("f")
+        self.lon = array("f")
+        self.codes = {f: array("i") for f in ADDRESS_FIELDS}
+        self.vocab = {f: {} for f in ADDRESS_FIELDS}
+
+    def _add(self, tags, lat, lon):
+        if "addr:street" not in tags and "addr:housenumber" not in tags:
+            return
+        self.lat.append(lat)
+        self.lon.append(lon)
+        for f in ADDRESS_FIELDS:
+            value = tags.get(f"addr:{f}")
+            if value:
+                value = value.replace("\n", " ").strip()
+                vocab = self.vocab[f]
+                self.codes[f].append(vocab.setdefault(value, len(vocab)))
+            else:
+                self.codes[f].append(-1)
+
+    def node(self, n):
+        if n.tags and n.location.valid():
+            self._add(n.tags, n.location.lat, n.location.lon)
+
+    def way(self, w):
+        if not w.tags or ("addr:street" not in w.tags and "addr:housenumber" not in w.tags):
+            return
+        locs = [n.location for n in w.nodes if n.location.valid()]
+        if locs:
+            self._add(w.tags, sum(l.lat for l in locs) / len(locs), sum(l.lon for l in locs) / len(locs))
+
+# === INDEX ===
+class AddressIndex:
+    """
+    Nearest-address lookup over OSM address points using a haversine BallTree.
+    """
+    def __init__(self, lat, lon, codes, vocab):
+        self.lat = lat
+        self.lon = lon
+        self.codes = codes
+        # Last entry is the empty string so that code -1 maps to ""
+        self.vocab = {f: np.array(list(vocab[f]) + [""], dtype=object) for f in ADDRESS_FIELDS}
+        self.tree = BallTree(np.radians(np.column_stack([lat, lon])), metric="haversine")
+
+    def __len__(self):
+        return len(self.codes[ADDRESS_FIELDS[0]])
+
+    @classmethod
+    def build(cls, pbf_paths):
+        handler = AddressHandler()
+        for path in pbf_paths:
+            print(f"🔍 Indexing addresses in {path}")
+            handler.apply_file(path, locations=True)
+        lat = np.frombuffer(handler.lat, dtype=np.float32)
+        lon = np.frombuffer(handler.lon, dtype=np.float32)
+        codes = {f: np.frombuffer(handler.codes[f], dtype=np.int32) for f in ADDRESS_FIELDS}
+        return cls(lat, lon, codes, {f: handler.vocab[f].keys() for f in ADDRESS_FIELDS})
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        arrays = {"lat": self.lat, "lon": self.lon}
+        for f in ADDRESS_FIELDS:
+            arrays[f"{f}_codes"] = self.codes[f]
+            arrays[f"{f}_vocab"] = np.array("\n".join(self.vocab[f][:-1]))
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        codes = {f: data[f"{f}_codes"] for f in ADDRESS_FIELDS}
+        vocab = {}
+        for f in ADDRESS_FIELDS:
+            text = str(data[f"{f}_vocab"])
+            vocab[f] = text.split("\n") if text else []
+        return cls(data["lat"], data["lon"], codes, vocab)
+
+    def lookup(self, lats, lons):
+        """
+        Return (addresses, distances in meters) of the nearest indexed address
+        for each coordinate. Addresses use the same "street, housenumber,
+        postcode, city" layout as the OSM extracts.
+        """
+        query = np.radians(np.column_stack([np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)]))
+        dist, idx = self.tree.query(query, k=1)
+        idx = idx[:, 0]
+        parts = [self.vocab[f][self.codes[f][idx]] for f in ADDRESS_FIELDS]
+        addresses = np.array([", ".join(p for p in row if p) for row in zip(*parts)], dtype=object)
+        return addresses, dist[:, 0] * EARTH_RADIUS_METERS
+
+def load_or_build_index(index_path, pbf_paths):
+    """Load the saved index, or build it from the PBF extracts. Returns None if neither exists."""
+    if os.path.exists(index_path):
+        index = AddressIndex.load(index_path)
+        print(f"📇 Loaded address index with {len(index)} points from {index_path}")
+        return index
+    pbf_paths = [p for p in pbf_paths if os.path.exists(p)]
+    if not pbf_paths:
+        print("⚠️ No address index or PBF extracts found; using Nominatim only.")
+        return None
+    index = AddressIndex.build(pbf_paths)
+    index.save(index_path)
+    print(f"💾 Address index with {len(index)} points saved to {index_path}")
+    return index
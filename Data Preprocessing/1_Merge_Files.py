@@ -1,17 +1,27 @@
-import pandas as pd
+import os
 import re
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from functools import lru_cache
 from difflib import get_close_matches
+from merge_config import MERGE_SOURCES
 
-# List of CSV file paths
-csv_file_paths = [
-    "C:/Users/myuan/Desktop/CHE/OSM/CHE_VP_OSM.csv",
-    "C:/Users/myuan/Desktop/CHE/LocalCH/vet_practices.csv",
-    "C:/Users/myuan/Desktop/CHE/GST/vet_practices.csv",
-    # Add more paths
-]
+# === CONFIGURATION ===
+BASE_DIR = "C:/Users/myuan/Desktop/VetMap_Data"
+# Country-partitioned Parquet dataset: merged/country=<ISO>/part-0.parquet
+OUTPUT_DIR = os.path.join(BASE_DIR, "merged")
+CHUNK_SIZE = 50_000  # rows read per chunk
+COUNTRIES = None  # None = every country in MERGE_SOURCES
 
 # Target columns with correct names
 target_columns = ["Name", "Address", "Email", "Website", "Specialization", "Category", "Latitude", "Longitude"]
+numeric_columns = {"Latitude", "Longitude"}
+schema = pa.schema(
+    [(col, pa.float64() if col in numeric_columns else pa.string()) for col in target_columns]
+    + [("Provenance", pa.string())]
+)
 
 # Normalize function for column names
 def normalize(col_name):
@@ -20,46 +30,70 @@ def normalize(col_name):
 # Mapping from normalized form to original column name
 normalized_target = {normalize(col): col for col in target_columns}
 
-df_list = []
+# === COLUMN MAPPING (cached per source schema) ===
+@lru_cache(maxsize=None)
+def resolve_column_mapping(columns):
+    """Map target columns to the columns of a file header (tuple), using fuzzy matching."""
+    normalized_map = {normalize(col): col for col in columns}
+    matched_cols = {}
+    for norm_col, orig_col in normalized_map.items():
+        match = get_close_matches(norm_col, normalized_target.keys(), n=1, cutoff=0.85)
+        if match:
+            matched_cols[normalized_target[match[0]]] = orig_col
+    return matched_cols
+
+def standardize_chunk(chunk, mapping, source):
+    cleaned_df = pd.DataFrame(index=chunk.index)
+    for target_col in target_columns:
+        values = chunk[mapping[target_col]] if target_col in mapping else pd.Series(pd.NA, index=chunk.index)
+        if target_col in numeric_columns:
+            cleaned_df[target_col] = pd.to_numeric(values, errors="coerce")
+        else:
+            # Same missing values as a CSV round trip: empty strings become null
+            cleaned_df[target_col] = values.astype("string").replace("", pd.NA)
+    # Not "Source": that name is the Google-first helper column of 2_Data_Cleaning.py / spatial_dedup.py
+    cleaned_df["Provenance"] = source
+    return cleaned_df
 
-for file_path in csv_file_paths:
-    try:
-        df = pd.read_csv(file_path)
-        original_len = len(df)
-        print(f"Read {original_len} rows from: {file_path}")
+# === MERGE ONE COUNTRY ===
+def merge_country(iso, sources):
+    partition_dir = os.path.join(OUTPUT_DIR, f"country={iso}")
+    shutil.rmtree(partition_dir, ignore_errors=True)
+    os.makedirs(partition_dir, exist_ok=True)
 
-        # Build normalized map of current file
-        normalized_map = {normalize(col): col for col in df.columns}
+    seen_names = set()  # only state kept across chunks: names already written
+    total_read = total_written = 0
+    with pq.ParquetWriter(os.path.join(partition_dir, "part-0.parquet"), schema) as writer:
+        for src in sources:
+            file_path, source = src["path"], src["source"]
+            try:
+                header = pd.read_csv(file_path, nrows=0).columns
+                mapping = resolve_column_mapping(tuple(header))
+                print(f"Reading {file_path} ({source}) — {len(mapping)}/{len(target_columns)} columns matched")
 
-        # Try to match normalized columns to the target
-        matched_cols = {}
-        for norm_col, orig_col in normalized_map.items():
-            match = get_close_matches(norm_col, normalized_target.keys(), n=1, cutoff=0.85)
-            if match:
-                matched_cols[normalized_target[match[0]]] = orig_col
+                for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE):
+                    total_read += len(chunk)
+                    cleaned_df = standardize_chunk(chunk, mapping, source)
+                    # Drop duplicates based on the "Name" column, across all chunks and sources
+                    cleaned_df = cleaned_df.drop_duplicates(subset=["Name"])
+                    name_keys = cleaned_df["Name"].fillna("\0")
+                    cleaned_df = cleaned_df[~name_keys.isin(seen_names)]
+                    seen_names.update(name_keys[cleaned_df.index])
+                    if cleaned_df.empty:
+                        continue
+                    writer.write_table(pa.Table.from_pandas(cleaned_df, schema=schema, preserve_index=False))
+                    total_written += len(cleaned_df)
+            except Exception as e:
+                print(f"Error processing {file_path}: {e}")
 
-        # Create an empty DataFrame with all target columns
-        cleaned_df = pd.DataFrame(columns=target_columns)
-        # Fill in matched columns
-        for target_col in target_columns:
-            if target_col in matched_cols:
-                cleaned_df[target_col] = df[matched_cols[target_col]]
-            else:
-                cleaned_df[target_col] = ""  # fill missing with empty string
-        
-        cleaned_len = len(cleaned_df)
-        print(f"Cleaned to {cleaned_len} rows with standardized columns.")
-        df_list.append(cleaned_df)
+    print(f"✅ {iso}: {total_read} rows read, {total_written} rows after dropping duplicates on 'Name' → {partition_dir}")
+    return total_written
 
-    except Exception as e:
-        print(f"Error processing {file_path}: {e}")
+def merge_all(countries=None):
+    countries = countries or sorted(MERGE_SOURCES)
+    for iso in countries:
+        merge_country(iso, MERGE_SOURCES[iso])
+    print(f"✅ Merged dataset saved to {OUTPUT_DIR}")
 
-# Concatenate all cleaned DataFrames
-merged_df = pd.concat(df_list, ignore_index=True)
-print(f"\nTotal rows after concatenation: {len(merged_df)}")
-# Drop duplicates based on the "Name" column
-merged_df.drop_duplicates(subset=["Name"], inplace=True)
-print(f"Total rows after dropping duplicates on 'Name': {len(merged_df)}")
-# Save the merged DataFrame
-merged_df.to_csv("C:/Users/myuan/Desktop/CHE/merged_output.csv", index=False)
-print("✅ Merged CSV saved!")
+if __name__ == "__main__":
+    merge_all(COUNTRIES)
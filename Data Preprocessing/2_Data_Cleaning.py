@@ -1,203 +1,121 @@
 import os
+import sys
 import time
-import requests
-import socket
+from functools import lru_cache
+from dotenv import load_dotenv
 import pandas as pd
-import numpy as np
-import unicodedata
-import tldextract
-from urllib.parse import urlparse
-import geopandas as gpd
-from rapidfuzz import fuzz, process
-from rapidfuzz.process import cdist
-from shapely.geometry import Point
-from sklearn.cluster import DBSCAN
+import spatial_dedup
+from fuzzy_matching import match_one_to_one, reference_match_mask
+from keyword_matcher import KeywordMatcher
+from url_validator import DNSCache, clean_urls
+from geocoding import Geocoder, normalize_query
+from journal import AppendOnlyJournal, row_keys
+# Shared country boundaries live in boundary_store.py at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from boundary_store import get_country_boundary
 
 # === CONFIGURATION ===
 BASE_DIR = "C:/Users/myuan/Desktop/VetMap_Data"
 COUNTRY_DIR = "CHE"
+COUNTRY_TLD = "ch"  # websites on other ccTLDs are dropped
 KEYWORD_DIR = "C:/Users/myuan/Desktop/VetMap/Keyword"
 SHP_DIR = "C:/Users/myuan/Desktop/Data/shapefile/country"
-# --- INPUT FILES ---
-website_csv = os.path.join(BASE_DIR, "merged_output.csv")
-google_csv = os.path.join(BASE_DIR, COUNTRY_DIR, f"GM/{COUNTRY_DIR}_VP_GM.csv")
-closed_csv = os.path.join(BASE_DIR, COUNTRY_DIR, f"GM/{COUNTRY_DIR}_VP_GM_dedup.csv")
+MERGED_DATASET_DIR = os.path.join(BASE_DIR, "merged")  # from 1_Merge_Files.py
 bad_words_csv = os.path.join(KEYWORD_DIR, "nonclinic_keywords.csv")
-shapefile_path = os.path.join(SHP_DIR, COUNTRY_DIR, f"{COUNTRY_DIR}1_nr.shp")
-# --- OUTPUT FILES ---
-text_matched_csv = os.path.join(BASE_DIR, COUNTRY_DIR, "VP_text_matched.csv")
-cleaned_google_csv = os.path.join(BASE_DIR, COUNTRY_DIR, f"GM/{COUNTRY_DIR}_VP_GM_cleaned.csv")
-cleaned_website_csv = os.path.join(BASE_DIR, COUNTRY_DIR, "merged_output_cleaned.csv")
-GEOCODING_OUTPUT_PATH = os.path.join(BASE_DIR, COUNTRY_DIR, "VP_geocoded.csv")
-DEDUPED_OUTPUT_PATH = os.path.join(BASE_DIR, COUNTRY_DIR, "VP_cleaned.csv")
-NON_CLINIC_PATH = os.path.join(BASE_DIR, COUNTRY_DIR, f"{COUNTRY_DIR}_Not_Clinic.csv")
-DUPLICATES_PATH = os.path.join(BASE_DIR, COUNTRY_DIR, f"{COUNTRY_DIR}_Duplicated_Rows.csv")
+
+def set_country(country_dir, country_tld):
+    """Point the per-country input/output paths at country_dir (also used by 2_Multi_Country_Cleaning.py)."""
+    global COUNTRY_DIR, COUNTRY_TLD, google_csv, closed_csv, text_matched_csv, cleaned_google_csv, \
+        cleaned_website_csv, GEOCODING_OUTPUT_PATH, DEDUPED_OUTPUT_PATH, NON_CLINIC_PATH, DUPLICATES_PATH
+    COUNTRY_DIR, COUNTRY_TLD = country_dir, country_tld
+    # --- INPUT FILES ---
+    google_csv = os.path.join(BASE_DIR, COUNTRY_DIR, f"GM/{COUNTRY_DIR}_VP_GM.csv")
+    closed_csv = os.path.join(BASE_DIR, COUNTRY_DIR, f"GM/{COUNTRY_DIR}_VP_GM_dedup.csv")
+    # --- OUTPUT FILES ---
+    text_matched_csv = os.path.join(BASE_DIR, COUNTRY_DIR, "VP_text_matched.csv")
+    cleaned_google_csv = os.path.join(BASE_DIR, COUNTRY_DIR, f"GM/{COUNTRY_DIR}_VP_GM_cleaned.csv")
+    cleaned_website_csv = os.path.join(BASE_DIR, COUNTRY_DIR, "merged_output_cleaned.csv")
+    GEOCODING_OUTPUT_PATH = os.path.join(BASE_DIR, COUNTRY_DIR, "VP_geocoded.csv")
+    DEDUPED_OUTPUT_PATH = os.path.join(BASE_DIR, COUNTRY_DIR, "VP_cleaned.csv")
+    NON_CLINIC_PATH = os.path.join(BASE_DIR, COUNTRY_DIR, f"{COUNTRY_DIR}_Not_Clinic.csv")
+    DUPLICATES_PATH = os.path.join(BASE_DIR, COUNTRY_DIR, f"{COUNTRY_DIR}_Duplicated_Rows.csv")
+
+set_country(COUNTRY_DIR, COUNTRY_TLD)
 # --- VARIABLES ---
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY_1")
 USER_AGENT = os.getenv("OSM_USER_AGENT")
 SAVE_INTERVAL = 10
 DISTANCE_THRESHOLD_METERS = 50
-EARTH_RADIUS_METERS = 6371000
+CLOSED_MATCH_RADIUS_METERS = 1000  # None = compare with every closed clinic
+BORDER_BUFFER_METERS = 0  # optional: e.g. 100 keeps practices just outside the border (slightly-off coordinates); 0 = strict
 similarity_threshold = 85
 name_col = "Name"
 address_col = "Address"
-nonclinic_keywords_df = pd.read_csv(bad_words_csv, encoding='utf-8')
-nonclinic_keywords = set(k.lower().strip() for k in nonclinic_keywords_df['Keyword'].dropna())
-
-non_html_extensions = (
-    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp",
-    ".pdf", ".doc", ".docx", ".xls", ".xlsx",
-    ".zip", ".rar", ".mp4", ".mp3", ".avi", ".mov"
-)
+
+@lru_cache(maxsize=None)
+def get_nonclinic_matcher():
+    """Non-clinic keywords, read and compiled once per process on first use."""
+    nonclinic_keywords_df = pd.read_csv(bad_words_csv, encoding='utf-8')
+    return KeywordMatcher(nonclinic_keywords_df['Keyword'].dropna())
+
+dns_cache = DNSCache()  # hostname → resolves, shared with 3_Web_Finding.py
+geocoder = Geocoder(USER_AGENT, GOOGLE_API_KEY)  # query cache shared across countries and reruns
 # ===================================================================
 # === CLEAN GOOGLE MAP DATA AS BENCHMARK ===
 # ===================================================================
 
-def normalize_text(text):
-    return unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode().lower().strip()
-
-def keyword_match(name, keywords, threshold=85):
-    name_norm = normalize_text(name)
-    return any(
-        (fuzz.partial_ratio(keyword, name_norm) >= threshold and keyword in name_norm)
-        for keyword in (normalize_text(k) for k in keywords)
-    )
+# Non-clinic names are flagged with get_nonclinic_matcher() (keyword_matcher.py), one pass per column
 # ===================================================================
 # === DISTANCE DEDUPLICATION ===
 # ===================================================================
 
-# --- DEDUPLICATE USING DBSCAN CLUSTERING ---
-def merge_cluster_rows(group):
-    merged = {}
-
-    # Pick the Google base row if it exists
-    if "Source" in group.columns:
-        google_rows = group[group["Source"].astype(str).str.contains("google", case=False, na=False)]
-        google_base = google_rows.iloc[0] if not google_rows.empty else None
-    else:
-        google_base = None
-
-    for col in group.columns:
-        if col in ["cluster"]:  # skip helper col
-            continue
-
-        non_nulls = group[col].dropna().astype(str).unique()
-        # --- Special handling for Specialization ---
-        if col == "Specialization":
-            if google_base is not None and pd.notna(google_base.get(col)):
-                google_val = str(google_base[col]).strip()
-                # concatenate Google + other values, remove duplicates
-                all_vals = set(non_nulls.tolist() + [google_val])
-                merged[col] = ", ".join(sorted(all_vals))
-            elif len(non_nulls) > 0:
-                merged[col] = ", ".join(non_nulls)
-            else:
-                merged[col] = None
-            continue
-        # --- Default for all other columns ---
-        if google_base is not None and pd.notna(google_base.get(col)) and str(google_base[col]).strip().lower() not in ["nan", "none", "null", ""]:
-            merged[col] = google_base[col]
-        else:
-            merged[col] = non_nulls[0] if len(non_nulls) > 0 else None
-
-    return pd.Series(merged)
-
-def deduplicate_with_dbscan(df):
-    coords_rad = np.radians(df[['Latitude', 'Longitude']].values)
-    db = DBSCAN(
-        eps=DISTANCE_THRESHOLD_METERS / EARTH_RADIUS_METERS,
-        min_samples=1,
-        metric='haversine'
-    ).fit(coords_rad)
-
-    df['cluster'] = db.labels_
-    # --- Save duplicates ---
-    cluster_counts = df['cluster'].value_counts()
-    duplicate_clusters = cluster_counts[cluster_counts > 1].index
-    duplicates_df = df[df['cluster'].isin(duplicate_clusters)].copy()
-    if not duplicates_df.empty:
-        duplicates_df.to_csv(DUPLICATES_PATH, index=False)
-    # --- Merge clusters with Google-first preference ---
-    deduped_df = (
-        df.groupby('cluster', group_keys=False, sort=False)
-          .apply(merge_cluster_rows, include_groups=False)
-          .reset_index(drop=True)
-    )
-
+# --- DEDUPLICATE BY DISTANCE (spatial_dedup.py) ---
+def deduplicate_by_distance(df):
+    # Singletons pass through; only clusters within DISTANCE_THRESHOLD_METERS are merged, Google first
+    deduped_df = spatial_dedup.deduplicate_by_distance(df, DISTANCE_THRESHOLD_METERS, DUPLICATES_PATH)
     # Drop helper columns
     deduped_df.drop(columns=['cluster', 'Source'], inplace=True, errors='ignore')
     return deduped_df
 
 def preprocess_google_data():
-    bad_words = nonclinic_keywords
-
     google_df = pd.read_csv(google_csv, index_col=False)
     google_df["Source"] = "Google"
+    google_df["Provenance"] = "Google"  # kept in the output, like the merged sources' Provenance
     google_df = google_df.dropna(subset=[name_col, address_col, 'Latitude', 'Longitude'], how="any")
     # --- Separate non-clinic rows ---
-    nonclinic_google = google_df[google_df[name_col].apply(lambda x: keyword_match(x, bad_words))]
-    clinic_google = google_df[~google_df[name_col].apply(lambda x: keyword_match(x, bad_words))]
+    nonclinic_mask = get_nonclinic_matcher().match(google_df[name_col])
+    nonclinic_google = google_df[nonclinic_mask]
+    clinic_google = google_df[~nonclinic_mask]
     # Save non-clinic rows
     if not nonclinic_google.empty:
         nonclinic_google.to_csv(NON_CLINIC_PATH, mode='w', index=False)  # overwrite on first write
-    deduped_google_df = deduplicate_with_dbscan(clinic_google)
+    deduped_google_df = deduplicate_by_distance(clinic_google)
     return deduped_google_df
 
 # ===================================================================
 # === TEXT MATCH DEDUPLICATION ===
 # ===================================================================
-# Function to validate and normalize website URLs
-def clean_website_url(url):
-    if not isinstance(url, str):
-        return None
-    url = url.strip().lower()
-    if url in ("", "none", "null", "nan"):
-        return None
-    if not (url.startswith("http://") or url.startswith("https://")):
-        return None
-
-    try:
-        parsed = urlparse(url)
-        hostname = parsed.hostname
-        if not hostname:
-            return None
-        socket.gethostbyname(hostname)  # DNS resolution
-
-        # TLD filtering
-        ext = tldextract.extract(hostname)
-        suffix = ext.suffix
-        if suffix != "ch" and len(suffix) == 2:
-            return None  # Foreign ccTLD (non-Swiss)
-
-        # If it's a downloadable file, return root homepage
-        if parsed.path.endswith(non_html_extensions):
-            return f"{parsed.scheme}://{hostname}/"
-
-        return url
-    except Exception:
-        return None
-
 # Main function
 def text_match_dedup(deduped_google_df):
-    website_df = pd.read_csv(website_csv, index_col=False)
-    bad_words = nonclinic_keywords
+    website_df = pd.read_parquet(MERGED_DATASET_DIR, filters=[("country", "==", COUNTRY_DIR)])
+    website_df = website_df.drop(columns="country")
 
     website_df = website_df.dropna(subset=[name_col, address_col], how="all")
-    nonclinic_web = website_df[website_df[name_col].apply(lambda x: keyword_match(x, bad_words))]
-    website_df = website_df[~website_df[name_col].apply(lambda x: keyword_match(x, bad_words))]
+    nonclinic_mask = get_nonclinic_matcher().match(website_df[name_col])
+    website_df = website_df[~nonclinic_mask]
     
     # --- Clean Website URLs without dropping rows ---
     if 'Website' in website_df.columns:
         pre_clean_valid_web = website_df['Website'].notna().sum()
-        website_df['Website'] = website_df['Website'].apply(clean_website_url)
+        website_df['Website'] = clean_urls(website_df['Website'], COUNTRY_TLD, dns_cache)
         website_df.to_csv(cleaned_website_csv, index=False)
         post_clean_valid_web = website_df['Website'].notna().sum()
         print(f"Website DF: Website values before cleaning = {pre_clean_valid_web}, after cleaning = {post_clean_valid_web}")
 
     if 'Website' in deduped_google_df.columns:
         pre_clean_valid_google = deduped_google_df['Website'].notna().sum()
-        deduped_google_df['Website'] = deduped_google_df['Website'].apply(clean_website_url)
+        deduped_google_df['Website'] = clean_urls(deduped_google_df['Website'], COUNTRY_TLD, dns_cache)
         deduped_google_df.to_csv(cleaned_google_csv, index=False)
         post_clean_valid_google = deduped_google_df['Website'].notna().sum()
         print(f"Google DF: Website values before cleaning = {pre_clean_valid_google}, after cleaning = {post_clean_valid_google}")
@@ -206,28 +124,21 @@ def text_match_dedup(deduped_google_df):
     website_df = website_df.reset_index(drop=True)
     deduped_google_df = deduped_google_df.reset_index(drop=True)
 
-    # --- Combine name + address for fuzzy matching ---
-    website_df["combined"] = website_df[name_col].astype(str) + " " + website_df[address_col].astype(str)
-    deduped_google_df["combined"] = deduped_google_df[name_col].astype(str) + " " + deduped_google_df[address_col].astype(str)
-
-    # --- Fuzzy match using token sort ratio ---
-    scores = cdist(website_df["combined"].tolist(), deduped_google_df["combined"].tolist(), scorer=fuzz.token_sort_ratio)
-    matched_google_indices = set()
-    matched_website_indices = set()
-    merged_rows = []
-
-    for i, (web_idx, row_web) in enumerate(website_df.iterrows()):
-        best_idx = np.argmax(scores[i])
-        best_score = scores[i][best_idx]
-        if best_score >= similarity_threshold and best_idx not in matched_google_indices:
-            row_google = deduped_google_df.iloc[best_idx].copy()
-            for col in ['Specialization', 'Website']:
-                if col in website_df.columns:
-                    if col not in row_google or pd.isna(row_google[col]):
-                        row_google[col] = row_web.get(col, None)
-            merged_rows.append(row_google)
-            matched_google_indices.add(best_idx)
-            matched_website_indices.add(web_idx)
+    # --- Fuzzy match using token sort ratio, blocked candidates only (fuzzy_matching.py) ---
+    matches = match_one_to_one(website_df, deduped_google_df, name_col, address_col, similarity_threshold)
+    matched_website_indices = matches["left"].to_numpy()
+    matched_google_indices = matches["right"].to_numpy()
+
+    # Matched rows keep the Google values; missing Specialization/Website/Email come from the website row
+    # (Email feeds the website inference from email domains in 3_Web_Finding.py)
+    matched_df = deduped_google_df.iloc[matched_google_indices].reset_index(drop=True)
+    for col in ['Specialization', 'Website', 'Email']:
+        if col in website_df.columns:
+            website_values = website_df[col].iloc[matched_website_indices].reset_index(drop=True)
+            if col in matched_df.columns:
+                matched_df[col] = matched_df[col].where(matched_df[col].notna(), website_values)
+            else:
+                matched_df[col] = website_values
 
     unmatched_website_df = website_df.drop(index=matched_website_indices)
     unmatched_google_df = deduped_google_df.drop(index=matched_google_indices)
@@ -235,7 +146,6 @@ def text_match_dedup(deduped_google_df):
         if col not in unmatched_google_df.columns:
             unmatched_google_df[col] = None
 
-    matched_df = pd.DataFrame(merged_rows)
     text_matched_df = pd.concat([matched_df, unmatched_website_df, unmatched_google_df], ignore_index=True)
     text_matched_df.drop_duplicates(subset=[name_col, address_col], inplace=True)
 
@@ -243,29 +153,13 @@ def text_match_dedup(deduped_google_df):
     if os.path.exists(closed_csv):
         closed_df = pd.read_csv(closed_csv, index_col=False)
         closed_df.dropna(subset=[name_col, address_col], inplace=True)
-        closed_df["combined"] = closed_df[name_col].astype(str) + " " + closed_df[address_col].astype(str)
-        closed_combined = closed_df["combined"].tolist()
-
-        text_matched_df["combined"] = text_matched_df[name_col].astype(str) + " " + text_matched_df[address_col].astype(str)
-        closed_addresses = closed_df[address_col].astype(str).tolist()
-        indices_to_remove = set()
-
-        for idx, row in text_matched_df.iterrows():
-            name = str(row.get(name_col, ""))
-            address = str(row.get(address_col, ""))
-            combined = f"{name} {address}"
-
-            match = process.extractOne(combined, closed_combined, scorer=fuzz.token_sort_ratio)
-            if match and match[1] >= 85:
-                indices_to_remove.add(idx)
-                continue
-
-            address_match = process.extractOne(address, closed_addresses, scorer=fuzz.token_sort_ratio)
-            if address_match and address_match[1] >= 90:
-                indices_to_remove.add(idx)
-
-        text_matched_df.drop(index=indices_to_remove, inplace=True)
-        text_matched_df.drop(columns=["combined"], inplace=True, errors="ignore")
+        # Name + address (>= 85) or address only (>= 90) against nearby closed clinics, in one batched pass
+        closed_mask = reference_match_mask(
+            text_matched_df, closed_df, name_col, address_col,
+            combined_cutoff=85, address_cutoff=90, radius_m=CLOSED_MATCH_RADIUS_METERS,
+        )
+        print(f"Removing {closed_mask.sum()} rows matching closed clinics")
+        text_matched_df = text_matched_df[~closed_mask]
     else:
         print(f"⚠️ Closed clinics file not found: {closed_csv}. Skipping closed-clinic removal.")
 
@@ -277,54 +171,22 @@ def text_match_dedup(deduped_google_df):
 # ===================================================================
 
 # === Geocoding Functions ===
-def build_query(row):
-    if pd.isna(row.get('Address')):
-        return None
-    parts = [str(row['Address'])]
-    if 'PLZ' in row and pd.notna(row['PLZ']):
-        parts.append(str(row['PLZ']))
-    if 'ORT' in row and pd.notna(row['ORT']):
-        parts.append(str(row['ORT']))
-    return ', '.join(parts)
-
-def geocode_osm(query):
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {'q': query, 'format': 'json', 'limit': 1}
-    headers = {'User-Agent': USER_AGENT}
-    try:
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        if data:
-            return float(data[0]['lat']), float(data[0]['lon'])
-    except Exception as e:
-        print(f"❌ OSM error for '{query}': {e}")
-    return None, None
-
-def geocode_google(query, api_key):
-    url = "https://maps.googleapis.com/maps/api/geocode/json"
-    params = {'address': query, 'key': api_key}
-    try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        result = response.json()
-        if result['status'] == 'OK':
-            location = result['results'][0]['geometry']['location']
-            return location['lat'], location['lng']
-    except Exception as e:
-        print(f"❌ Google error for '{query}': {e}")
-    return None, None
-
-# === Main geocoding loop ===
+def build_queries(df):
+    """Address[, PLZ][, ORT] for every row; None where the address is missing."""
+    if 'Address' not in df.columns:
+        return pd.Series(None, index=df.index, dtype=object)
+    queries = df['Address'].astype(str)
+    for col in ['PLZ', 'ORT']:
+        if col in df.columns:
+            queries = queries.where(df[col].isna(), queries + ', ' + df[col].astype(str))
+    return queries.where(df['Address'].notna(), None)
+
+# Requests, rate limits and the query cache live in geocoding.py
 def geocode_dataframe(df):
     final_path = GEOCODING_OUTPUT_PATH
-    partial_path = GEOCODING_OUTPUT_PATH.replace(".csv", "_partial.csv")
+    journal_path = GEOCODING_OUTPUT_PATH.replace(".csv", "_journal.csv")
 
-    # === Resume logic ===
-    if os.path.exists(partial_path):
-        print(f"🔄 Resuming from partial save: {partial_path}")
-        df = pd.read_csv(partial_path)
-    elif os.path.exists(final_path):
+    if os.path.exists(final_path) and not os.path.exists(journal_path):
         print(f"✅ Final geocoded file already exists: {final_path}")
         return pd.read_csv(final_path)
 
@@ -332,71 +194,95 @@ def geocode_dataframe(df):
         df['Latitude'] = None
     if 'Longitude' not in df.columns:
         df['Longitude'] = None
+    keys = row_keys(df, [name_col, address_col])
+
+    # === Resume logic: apply the journal, nothing else is re-read ===
+    journal = AppendOnlyJournal.read(journal_path)
+    if not journal.empty:
+        journal = journal[journal['provider'] != "error"]  # failed requests are retried, not resumed
+        print(f"🔄 Resuming from journal: {len(journal)} rows already geocoded ({journal_path})")
+        missing = df['Latitude'].isna() | df['Longitude'].isna()
+        done = missing & keys.isin(journal.index)
+        df.loc[done, 'Latitude'] = keys[done].map(journal['lat']).to_numpy()
+        df.loc[done, 'Longitude'] = keys[done].map(journal['lon']).to_numpy()
+    else:
+        done = pd.Series(False, index=df.index)
 
-     # --- Identify rows that need geocoding ---
-    rows_to_geocode = df[df['Latitude'].isna() | df['Longitude'].isna()]
-    total_to_geocode = len(rows_to_geocode)
-
+    # --- Identify rows that need geocoding, one normalized query per row ---
+    rows_to_geocode = df[(df['Latitude'].isna() | df['Longitude'].isna()) & ~done]
+    queries = build_queries(rows_to_geocode).dropna().map(normalize_query)
+    rows_by_query = queries.groupby(queries).groups
+    total_to_geocode = len(rows_by_query)
     geocoded_count = 0
 
-    for idx, row in rows_to_geocode.iterrows():
-        query = build_query(row)
-        if not query:
-            continue
-
-        lat, lon = geocode_osm(query)
-        # Fallback to Google if OSM failed
-        if (lat is None or lon is None) and GOOGLE_API_KEY:
-            lat, lon = geocode_google(query, GOOGLE_API_KEY)
-        
-        if lat is not None and lon is not None:
-            df.at[idx, 'Latitude'] = lat
-            df.at[idx, 'Longitude'] = lon
-
-        geocoded_count += 1
-        time.sleep(1)
-
-        if geocoded_count % SAVE_INTERVAL == 0:
-            percent = (geocoded_count / total_to_geocode) * 100
-            df.to_csv(partial_path, index=False)
-            print(f"💾 Progress saved ({geocoded_count}/{total_to_geocode} rows, {percent:.1f}%) → {partial_path}")
+    with AppendOnlyJournal(journal_path, ["lat", "lon", "provider"]) as log:
+        def record_result(query, result):
+            # One small record per row as soon as its query is answered
+            nonlocal geocoded_count
+            lat, lon, provider, _ = result
+            geocoded_count += 1
+            if provider != "error":  # a failed request is not an answer: the next run tries again
+                for key in keys[rows_by_query[query]]:
+                    log.append(key, lat=lat, lon=lon, provider=provider)
+            if geocoded_count % SAVE_INTERVAL == 0:
+                percent = (geocoded_count / total_to_geocode) * 100
+                print(f"💾 Progress journaled ({geocoded_count}/{total_to_geocode} queries, {percent:.1f}%) → {journal_path}")
+
+        results = geocoder.geocode_all(rows_by_query.keys(), on_result=record_result)
+
+    # --- Apply all results once ---
+    row_queries = rows_to_geocode.index.to_series().map(queries).dropna()
+    coords = pd.DataFrame.from_dict(results, orient='index', columns=['lat', 'lon', 'provider', 'confidence'])
+    if not row_queries.empty and not coords.empty:
+        df.loc[row_queries.index, 'Latitude'] = row_queries.map(coords['lat']).to_numpy()
+        df.loc[row_queries.index, 'Longitude'] = row_queries.map(coords['lon']).to_numpy()
 
     # Final save
     df.to_csv(final_path, index=False)
     print(f"✅ Final geocoded file saved: {final_path}")
 
-    if os.path.exists(partial_path):
-        os.remove(partial_path)
-        print(f"🗑️ Removed partial file: {partial_path}")
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+        print(f"🗑️ Removed journal: {journal_path}")
 
     return df
 
 # --- FILTER BY COUNTRY BORDER ---
-def filter_by_country_border(df, shapefile_path):
+def filter_by_country_border(df, country_dir):
     print("Filtering practices within country border...")
-    country_shape = gpd.read_file(shapefile_path)
-    if country_shape.crs != 'EPSG:4326':
-        country_shape = country_shape.to_crs('EPSG:4326')
-
-    gdf = gpd.GeoDataFrame(df, geometry=[Point(xy) for xy in zip(df['Longitude'], df['Latitude'])], crs='EPSG:4326')
-    country_union = country_shape.union_all()
-    filtered_gdf = gdf[gdf.geometry.within(country_union)]
-    return pd.DataFrame(filtered_gdf.drop(columns='geometry'))
+    boundary = get_country_boundary(country_dir, SHP_DIR)
+    lons = pd.to_numeric(df['Longitude'], errors='coerce')
+    lats = pd.to_numeric(df['Latitude'], errors='coerce')
+    # bbox → simplified band → exact geometry near the border only (boundary_store.py)
+    inside = boundary.contains_points(lons, lats, buffer_m=BORDER_BUFFER_METERS)
+    print(f"{inside.sum()} of {len(df)} practices within {BORDER_BUFFER_METERS} m of the {country_dir} border")
+    return df[inside]
 
 # --- MAIN DEDUPLICATION FUNCTION ---
-def vp_dedup():
-    print("Data Cleaning Start:")
-    deduped_google_df = preprocess_google_data()
-    df_text_matched = text_match_dedup(deduped_google_df)
-    df_geocoded = geocode_dataframe(df_text_matched)
-    df_geo_filtered = filter_by_country_border(df_geocoded, shapefile_path)
-    geo_deduped_df = deduplicate_with_dbscan(df_geo_filtered)
+def run_stage(stats, stage, func, *args):
+    """Run one stage, recording its output row count and duration in stats."""
+    start = time.perf_counter()
+    result = func(*args)
+    stats.append({"stage": stage, "rows": len(result), "seconds": round(time.perf_counter() - start, 2)})
+    print(f"⏱️ {COUNTRY_DIR} {stage}: {len(result)} rows in {stats[-1]['seconds']}s")
+    return result
+
+def vp_dedup(stats=None):
+    """Clean the current country; per-stage row counts and timings are appended to stats and returned."""
+    print(f"Data Cleaning Start: {COUNTRY_DIR}")
+    stats = [] if stats is None else stats
+    deduped_google_df = run_stage(stats, "google_preprocess", preprocess_google_data)
+    df_text_matched = run_stage(stats, "text_match", text_match_dedup, deduped_google_df)
+    df_geocoded = run_stage(stats, "geocode", geocode_dataframe, df_text_matched)
+    df_geo_filtered = run_stage(stats, "border_filter", filter_by_country_border, df_geocoded, COUNTRY_DIR)
+    geo_deduped_df = run_stage(stats, "distance_dedup", deduplicate_by_distance, df_geo_filtered)
     # --- Final cleanup: drop helper columns ---
     helper_cols = ["cluster", "Source", "combined"]
     geo_deduped_df = geo_deduped_df.drop(columns=[c for c in helper_cols if c in geo_deduped_df.columns])
 
     geo_deduped_df.to_csv(DEDUPED_OUTPUT_PATH, index=False)
     print("✅ File after distance deduplication saved.")
+    return stats
 # --- MAIN EXECUTION ---
 if __name__ == "__main__":
     vp_dedup()
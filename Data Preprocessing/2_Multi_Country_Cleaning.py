@@ -0,0 +1,109 @@
+import os
+import time
+import importlib
+import traceback
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import geocoding
+
+# === CONFIGURATION ===
+BASE_DIR = "C:/Users/myuan/Desktop/VetMap_Data"
+SUMMARY_PATH = os.path.join(BASE_DIR, "cleaning_summary.csv")
+MAX_WORKERS = 4
+# ISO3 code → country-code TLD kept by the website filter
+COUNTRIES = {
+    "CHE": "ch",
+    # Add more countries
+}
+
+# ===================================================================
+# === WORKER ===
+# ===================================================================
+# Each worker process imports 2_Data_Cleaning once. The compiled non-clinic
+# keyword matcher is built in the initializer, country boundaries are memoized
+# by boundary_store, and the DNS / geocoding caches are loaded with the module,
+# so every country after the first in a worker starts without that setup.
+# Each worker has its own geocoding rate limiters, so the provider rates are
+# split between the workers: the pool as a whole stays within NOMINATIM_RPS
+# (the public instance allows 1 request/s) and GOOGLE_RPS.
+
+cleaning = None
+
+def init_worker(n_workers):
+    global cleaning
+    geocoding.NOMINATIM_RPS /= n_workers
+    geocoding.GOOGLE_RPS /= n_workers
+    cleaning = importlib.import_module("2_Data_Cleaning")
+    cleaning.get_nonclinic_matcher()
+
+def clean_country(iso, tld):
+    """Run vp_dedup for one country; a failure is reported in the summary rows instead of raised."""
+    start = time.perf_counter()
+    stats = []
+    status, error = "ok", ""
+    try:
+        cleaning.set_country(iso, tld)
+        cleaning.vp_dedup(stats)
+    except Exception as e:
+        status, error = "failed", f"{type(e).__name__}: {e}"
+        print(f"❌ {iso} failed:\n{traceback.format_exc()}")
+    stats.append({"stage": "total", "rows": stats[-1]["rows"] if stats and status == "ok" else 0,
+                  "seconds": round(time.perf_counter() - start, 2)})
+    return [{"country": iso, **row, "status": status, "error": error} for row in stats]
+
+# ===================================================================
+# === MAIN ===
+# ===================================================================
+
+def run_pool(countries, max_workers):
+    """
+    Clean the countries in one process pool. Returns (summary rows, countries not
+    finished because a worker process died and took the pool down with it).
+    """
+    rows = []
+    unfinished = {}
+    if not countries:
+        return rows, unfinished
+    n_workers = min(max_workers, len(countries))
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=init_worker, initargs=(n_workers,)) as executor:
+        futures = {executor.submit(clean_country, iso, tld): iso for iso, tld in countries.items()}
+        for future in as_completed(futures):
+            iso = futures[future]
+            try:
+                country_rows = future.result()
+            except BrokenProcessPool:  # some worker died (e.g. out of memory): every pending country fails with it
+                unfinished[iso] = countries[iso]
+                continue
+            rows.extend(country_rows)
+            total = country_rows[-1]
+            print(f"{'✅' if total['status'] == 'ok' else '❌'} {iso}: {total['rows']} rows, {total['seconds']}s")
+    return rows, unfinished
+
+def run_all(countries=COUNTRIES, max_workers=MAX_WORKERS):
+    rows, unfinished = run_pool(countries, max_workers)
+    # Countries caught in a dead pool are retried one by one, each in a fresh single-worker pool,
+    # so a country that kills its worker again fails alone
+    if unfinished:
+        print(f"🔁 Worker process died; retrying {', '.join(unfinished)} one at a time")
+    for iso, tld in unfinished.items():
+        retry_rows, failed = run_pool({iso: tld}, 1)
+        if failed:
+            retry_rows = [{"country": iso, "stage": "total", "rows": 0, "seconds": None,
+                           "status": "failed", "error": "BrokenProcessPool: worker process died"}]
+            print(f"❌ {iso}: worker process died again")
+        rows.extend(retry_rows)
+
+    summary = pd.DataFrame(rows, columns=["country", "stage", "rows", "seconds", "status", "error"])
+    summary.to_csv(SUMMARY_PATH, index=False)
+    for value in ["rows", "seconds"]:
+        print(f"\n{value} per stage:")
+        print(summary.pivot_table(index="country", columns="stage", values=value, aggfunc="first", sort=False))
+    print(f"💾 Summary saved to {SUMMARY_PATH}")
+    failed = summary.loc[summary["status"] == "failed", "country"].unique()
+    if len(failed):
+        print(f"⚠️ Failed countries: {', '.join(failed)}")
+    return summary
+
+if __name__ == "__main__":
+    run_all()
@@ -1,21 +1,21 @@
 import pandas as pd
 import os
 import time
-import socket
-import tldextract
 from random import uniform
 import concurrent.futures
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from urllib.parse import urlparse
-import tldextract
-from blacklist_config import BLACKLIST
+from domain_classifier import domain_classifier
+from url_validator import DNSCache, clean_urls
+from email_websites import websites_from_emails
+from driver_pool import DriverPool, headless_options
+from resource_blocking import BlockPolicy, block_resources_cdp
+from search_throttle import EngineController
+from website_cache import WebsiteCache
+from search_backends import SEARCH_TOP_K, SearxngBackend, FunctionBackend, active_backends, search_first
 
 # --- CONFIGURATION ---
 BASE_DIR = "C:/Users/myuan/Desktop/CHE"
@@ -24,87 +24,38 @@ SAVE_PATH = os.path.join(BASE_DIR, "VP_website_filled.csv")
 AUTOSAVE_PATH = os.path.join(BASE_DIR, "website_autosave.csv")
 
 MAX_WORKERS = 4
-BATCH_SIZE = 20
-GOOGLE_BLOCK_THRESHOLD = 3
+BATCH_SIZE = 20  # rows between autosaves
 country_code = "ch"
 
-# --- GLOBAL STATE ---
-google_block_count = 0
-use_bing_only = False
-NETLOC_BLOCKLIST = {
-    # 🔗 Messaging platforms
-    "wa.me", "web.whatsapp.com", "t.me", "telegram.me", "signal.org", "messenger.com",
-
-    # 🔗 URL shorteners & redirectors
-    "bit.ly", "tinyurl.com", "shorturl.at", "rebrand.ly", "goo.gl",
-    "t.co", "fb.me", "lnkd.in", "shorte.st", "ow.ly", "buff.ly",        
-    "smarturl.it", "is.gd", "v.gd", "s.id", "cutt.ly", "rb.gy"
-}
-non_html_extensions = (
-    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp",
-    ".pdf", ".doc", ".docx", ".xls", ".xlsx",
-    ".zip", ".rar", ".mp4", ".mp3", ".avi", ".mov"
-)
-# --- CLEAN EXISTING URLS ---
-def clean_and_filter_url(url):
-    try:
-        if pd.isna(url):
-            return None
-
-        url = str(url).strip().lower()
-        if url in ("", "none", "null", "nan"):
-            return None
+dns_cache = DNSCache()  # hostname → resolves, shared with 2_Data_Cleaning.py
+website_cache = WebsiteCache()  # practice → chosen URL, shared with 3_Web_Luckybtn.py and other countries
 
-        if not (url.startswith("http://") or url.startswith("https://")):
-            return None
-
-        parsed = urlparse(url)
-        hostname = parsed.hostname
-        if not hostname:
-            return None
-        socket.gethostbyname(hostname)  # DNS check
-
-        ext = tldextract.extract(hostname)
-        suffix = ext.suffix
-        # Extract final part of the suffix
-        suffix_parts = suffix.split(".")
-        last_suffix = suffix_parts[-1]
-        if len(last_suffix) == 2 and last_suffix != country_code:
-            return None  # Foreign ccTLD
-        
-        full_url = parsed.path + parsed.query
-        if full_url.endswith(non_html_extensions):
-            return f"{parsed.scheme}://{parsed.hostname}/"
-
-        return url
-    except Exception:
-        return None
+# --- BROWSERS ---
+# One long-lived Chrome per worker thread and engine, replaced after
+# MAX_QUERIES_PER_DRIVER queries or when Google shows a block page
+NO_ASSETS_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.default_content_setting_values.stylesheets": 2,
+    "profile.managed_default_content_settings.javascript": 2
+}
+# Fonts, media and tracker/embed domains on top of the prefs above; these browsers only open search pages,
+# so blocking domains cannot stop a navigation
+block_policy = BlockPolicy()
+google_pool = DriverPool(lambda: headless_options(NO_ASSETS_PREFS, ["--silent"]),
+                         on_launch=lambda driver: block_resources_cdp(driver, block_policy, domains=True))
+bing_pool = DriverPool(lambda: headless_options(NO_ASSETS_PREFS),
+                       on_launch=lambda driver: block_resources_cdp(driver, block_policy, domains=True))
+
+# Per-engine pacing: parallelism grows while results come back clean and
+# backs off (with a cool-down and a later probe) on CAPTCHA / interstitial pages
+google_ctl = EngineController("Google", MAX_WORKERS)
+bing_ctl = EngineController("Bing", MAX_WORKERS)
 
 def is_blacklisted(url):
-    try:
-        parsed = urlparse(url)
-        netloc = parsed.netloc.lower().strip()
-
-        # Block exact domain/subdomain combinations like "wa.me"
-        if netloc in NETLOC_BLOCKLIST:
-            print(f"🧱 Blocked netloc: {netloc} from URL: {url}")
-            return True
-
-        extracted = tldextract.extract(url)
-        domain = extracted.domain.lower().strip() 
-        subdomain = extracted.subdomain.lower().strip() 
-        # ⚠️ Only exact match
-        if domain in BLACKLIST:
-            print(f"🧱 Blocked exact domain: {domain}.{extracted.suffix} from URL: {url}")
-            return True
-        for part in subdomain.split("."):
-            if part in BLACKLIST:
-                print(f"🧱 Blocked subdomain part: {part} in {subdomain} from URL: {url}")
-                return True
-
-        return False
-    except Exception:
-        return False
+    verdict = domain_classifier.host_verdict(urlparse(url).hostname or "")
+    if verdict:
+        print(f"🧱 Blocked ({verdict}): {url}")
+    return bool(verdict)
 
 # --- TYPING SIMULATION ---
 def simulate_typing(element, text, delay_range=(0.05, 0.15)):
@@ -113,33 +64,14 @@ def simulate_typing(element, text, delay_range=(0.05, 0.15)):
         time.sleep(uniform(*delay_range))
 
 # --- GOOGLE SEARCH ---
-def get_top_google_result(company_name, address, max_retries=3):
-    global google_block_count
-    query = f"{company_name} {address}"
+def get_top_google_results(query, k=SEARCH_TOP_K, max_retries=3):
+    """Top-k result URLs, [] for no results, None while Google cools down after a block."""
     for attempt in range(max_retries):
-        driver = None
+        if not google_ctl.acquire():
+            return None
+        outcome = "error"
         try:
-            time.sleep(uniform(2.0, 4.5))
-
-            opts = Options()
-            opts.add_argument("headless=new")
-            opts.add_argument("--window-size=1280,800")
-            opts.add_argument("--disable-gpu")
-            opts.add_argument("--no-sandbox")
-            opts.add_argument("--log-level=3")  # Suppress most Chrome logs
-            opts.add_argument("--disable-logging")
-            opts.add_argument("--silent") 
-            opts.add_argument("--disable-blink-features=AutomationControlled")
-            opts.add_experimental_option("excludeSwitches", ["enable-logging", "enable-automation"])
-            opts.add_experimental_option("useAutomationExtension", False)
-            opts.add_experimental_option("prefs", {
-                "profile.managed_default_content_settings.images": 2,
-                "profile.default_content_setting_values.stylesheets": 2,
-                "profile.managed_default_content_settings.javascript": 2
-            })
-
-            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            driver = google_pool.get()
             wait = WebDriverWait(driver, 10)
 
             driver.get("https://www.google.com")
@@ -153,102 +85,98 @@ def get_top_google_result(company_name, address, max_retries=3):
             simulate_typing(search_input, query)
             search_input.submit()
 
-            time.sleep(uniform(2.5, 4.0))
+            # Result list or block page, whichever shows up first
+            wait.until(EC.any_of(
+                EC.url_contains("sorry/index"),
+                EC.presence_of_element_located((By.ID, "search")),
+                EC.presence_of_element_located((By.CSS_SELECTOR, "div.yuRUbf > a")),
+            ))
 
             if "sorry/index" in driver.current_url or "interstitial" in driver.page_source.lower():
-                google_block_count += 1
-                print(f"[BLOCKED] Google blocked access for query: {query} (block #{google_block_count})")
-                raise ValueError("Google CAPTCHA or interstitial detected")
-            else:
-                google_block_count = 0  # reset on success
+                outcome = "block"
+                print(f"[BLOCKED] Google blocked access for query: {query}")
+                google_pool.recycle()  # blocked session: next attempt gets a fresh browser
+                return None
 
             result_links = driver.find_elements(By.CSS_SELECTOR, "div.yuRUbf > a")
-            if not result_links:
-                raise ValueError("No Google results")
-
-            url = result_links[0].get_attribute("href").strip()
-            if not url.startswith("http://") and not url.startswith("https://"):
-                raise ValueError("Invalid scheme — must start with http or https")
-            if is_blacklisted(url):
-                raise ValueError("Blacklisted domain")
-
-            return url
-
+            outcome = "success"
+            urls = [(link.get_attribute("href") or "").strip() for link in result_links[:k]]
+            return [url for url in urls if url.startswith(("http://", "https://"))]
+
+        except TimeoutException:
+            pass  # slow page: the next attempt reuses the same browser
+        except WebDriverException:
+            google_pool.recycle()  # crashed browser or lost session
         except Exception:
-            backoff = (attempt + 1) * 3
-            time.sleep(backoff)
+            pass
         finally:
-            if driver:
-                try:
-                    driver.quit()
-                except:
-                    pass
-    return None
+            google_ctl.release(outcome)
+        time.sleep((attempt + 1) * 3)
+    return []
 
 # --- BING SEARCH FALLBACK ---
-def get_top_bing_result(company_name, address):
-    query = f"{company_name} {address}"
-    driver = None
+def get_top_bing_results(query, k=SEARCH_TOP_K):
+    """Top-k result URLs, [] for no results or errors, None while Bing cools down after a block."""
+    if not bing_ctl.acquire():
+        return None
+    outcome = "error"
     try:
         print(f"🔁 Using Bing for: {query}")
-        time.sleep(uniform(2.0, 4.5))
-
-        opts = Options()
-        opts.add_argument("headless=new")
-        opts.add_argument("--window-size=1280,800")
-        opts.add_argument("--disable-gpu")
-        opts.add_argument("--no-sandbox")
-        opts.add_argument("--disable-blink-features=AutomationControlled")
-        opts.add_experimental_option("excludeSwitches", ["enable-automation"])
-        opts.add_experimental_option("useAutomationExtension", False)
-        opts.add_experimental_option("prefs", {
-            "profile.managed_default_content_settings.images": 2,
-            "profile.default_content_setting_values.stylesheets": 2,
-            "profile.managed_default_content_settings.javascript": 2
-        })
-
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-
+        driver = bing_pool.get()
         driver.get(f"https://www.bing.com/search?q={query}")
-        time.sleep(uniform(2.0, 3.0))
-
-        links = driver.find_elements(By.CSS_SELECTOR, "li.b_algo h2 a")
-        if not links:
+        WebDriverWait(driver, 10).until(EC.any_of(
+            EC.url_contains("captcha"),
+            EC.url_contains("/turing/"),
+            EC.presence_of_element_located((By.ID, "b_results")),
+        ))
+
+        if "captcha" in driver.current_url.lower() or "/turing/" in driver.current_url:
+            outcome = "block"
+            bing_pool.recycle()
             return None
 
-        url = links[0].get_attribute("href").strip()
-        if not url.startswith("http://") and not url.startswith("https://"):
-            return None
-        if is_blacklisted(url):
-                raise ValueError("Blacklisted domain")
-
-        return url
-
+        links = driver.find_elements(By.CSS_SELECTOR, "li.b_algo h2 a")
+        outcome = "success"
+        urls = [(link.get_attribute("href") or "").strip() for link in links[:k]]
+        return [url for url in urls if url.startswith(("http://", "https://"))]
+
+    except TimeoutException:
+        return []  # slow page: the browser stays in the pool
+    except WebDriverException:
+        bing_pool.recycle()
+        return []
     except Exception:
-        return None
+        return []
     finally:
-        if driver:
-            try:
-                driver.quit()
-            except:
-                pass
+        bing_ctl.release(outcome)
+
+# --- BROWSER SEARCH (fallback backend) ---
+def selenium_search(query, k=SEARCH_TOP_K):
+    """Google first, Bing when Google has nothing or cools down; waits if both engines cool down."""
+    while True:
+        urls = get_top_google_results(query, k)
+        if urls:
+            return urls
+        bing_urls = get_top_bing_results(query, k)
+        if bing_urls is not None or urls is not None:
+            return bing_urls or []
+        time.sleep(max(1.0, min(google_ctl.cooldown_remaining(), bing_ctl.cooldown_remaining())))
 
 # --- COMBINED SEARCH ---
+# HTTP metasearch first; the browser is only used when it is down, fails or has no results
+search_backends = [SearxngBackend(), FunctionBackend("selenium", selenium_search)]
+
 def safe_search(company_name, address):
-    global google_block_count, use_bing_only
-    if use_bing_only or google_block_count >= GOOGLE_BLOCK_THRESHOLD:
-        if not use_bing_only:
-            print(f"[INFO] Too many Google blocks — switching to Bing for all future queries.")
-            use_bing_only = True
-        return get_top_bing_result(company_name, address)
-
-    url = get_top_google_result(company_name, address)
+    cached = website_cache.get(company_name, address, country_code)
+    if cached is not None:
+        return cached[0]
+    query = f"{company_name} {address}"
+    url, backend = search_first(search_backends, query, lambda u: not is_blacklisted(u), SEARCH_TOP_K)
     if url:
-        google_block_count = 0
-        return url
-
-    return get_top_bing_result(company_name, address)
+        print(f"🔗 {backend}: {query} → {url}")
+    if backend:  # a backend answered: found, or only blacklisted results (not found)
+        website_cache.put(company_name, address, country_code, url, backend)
+    return url
 
 # --- PROCESS ONE ROW ---
 def process_row(row):
@@ -265,11 +193,18 @@ if __name__ == "__main__":
 
     df = pd.read_csv(INPUT_PATH)
     pre_clean_initial = df['Website'].notna().sum()
-    df['Website'] = df['Website'].apply(clean_and_filter_url)
+    df['Website'] = clean_urls(df['Website'], country_code, dns_cache)
     post_clean_initial = df['Website'].notna().sum()
     print(f"🧹Website values before cleaning = {pre_clean_initial}, after cleaning = {post_clean_initial}")
     total_rows = len(df)
 
+    # Custom email domains (info@tierarzt-xyz.ch) are checked over HTTP before any search
+    if "Email" in df.columns:
+        no_website = df["Website"].isna() & df["Email"].notna()
+        df.loc[no_website, "Website"] = websites_from_emails(df.loc[no_website, "Email"], country_code, dns_cache)
+        print(f"📧 Websites inferred from email domains: {df['Website'].notna().sum() - post_clean_initial}")
+
+    search_backends = active_backends(search_backends)
     all_indices = list(df.index)
     completed = 0
 
@@ -287,23 +222,13 @@ if __name__ == "__main__":
                     df.to_csv(AUTOSAVE_PATH, index=False)
                     print(f"💾 Autosave: {completed} rows processed and saved to: {AUTOSAVE_PATH}")
 
-            print("🕐 Waiting before next batch...")
-            time.sleep(uniform(10.0, 20.0))
+    google_pool.close_all()
+    bing_pool.close_all()
+    print(f"📊 {google_ctl.summary()} | {bing_ctl.summary()}")
 
-    def blacklist_check(url):
-        try:
-            netloc = urlparse(url).netloc.lower().replace("www.", "")
-            # Exact match for blocked netlocs
-            if netloc in NETLOC_BLOCKLIST:
-                return True
-            # Substring match for broader blacklist
-            return any(term in netloc for term in BLACKLIST)
-        except Exception:
-            return False
-    
     pre_clean_filled = df['Website'].notna().sum()
-    df["Website"] = df["Website"].apply(clean_and_filter_url)
-    df["Website"] = df["Website"].where(df["Website"].apply(lambda x: not blacklist_check(x) if pd.notna(x) else True))
+    df["Website"] = clean_urls(df["Website"], country_code, dns_cache)
+    df["Website"] = df["Website"].mask(domain_classifier.blocked(df["Website"]))
     post_clean_filled = df['Website'].notna().sum()
     print(f"🧹Website values before cleaning = {pre_clean_filled}, after cleaning = {post_clean_filled}")
     df.to_csv(SAVE_PATH, index=False)
@@ -2,35 +2,35 @@ import pandas as pd
 import os
 import time
 from random import randint
-import concurrent.futures
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException, WebDriverException
 
-from blacklist_config import BLACKLIST
-
-# Start timer
-start_time = time.time()
+from domain_classifier import domain_classifier
+from driver_pool import DriverPool, headless_options
+from resource_blocking import BlockPolicy, block_resources_cdp
+from website_cache import WebsiteCache
+from email_websites import websites_from_emails
+from url_validator import DNSCache
+from journal import AppendOnlyJournal, row_keys
+from streaming_executor import stream_map
 
 # Paths and config
 BASE_DIR = "C:/Users/myuan/Desktop/CHE"
 INPUT_PATH = os.path.join(BASE_DIR, "VP_cleaned.csv")
 SAVE_PATH = os.path.join(BASE_DIR, "VP_website_filled.csv")
-AUTOSAVE_PATH = os.path.join(BASE_DIR, "website_autosave.csv")
+JOURNAL_PATH = os.path.join(BASE_DIR, "website_lucky_journal.csv")  # one line per searched row, for resuming
 
 MAX_WORKERS = 4
-SAVE_INTERVAL = 25  # Autosave frequency
-
-# Load data
-df = pd.read_csv(INPUT_PATH)
-total_rows = len(df)
+MAX_IN_FLIGHT = 4 * MAX_WORKERS  # rows submitted but not finished; the input is read only as fast as this drains
+CHUNK_ROWS = 50_000              # input rows read per chunk
+PROGRESS_INTERVAL = 25
+country_code = "ch"
+website_cache = WebsiteCache()  # practice → chosen URL, shared with 3_Web_Finding.py and other countries
+dns_cache = DNSCache()  # hostname → resolves, shared with 2_Data_Cleaning.py and 3_Web_Finding.py
 
 # Clean: Remove all Website entries that are not valid http/https links
 def clean_invalid_urls(value):
@@ -39,40 +39,31 @@ def clean_invalid_urls(value):
     value = str(value).strip()
     return value if value.startswith("http://") or value.startswith("https://") else None
 
-df["Website"] = df["Website"].apply(clean_invalid_urls)
-initial_missing = df["Website"].isna().sum()
+def read_chunks():
+    for chunk in pd.read_csv(INPUT_PATH, chunksize=CHUNK_ROWS):
+        chunk["Website"] = chunk["Website"].apply(clean_invalid_urls)
+        yield chunk
+
+# One long-lived Chrome per worker thread, replaced after MAX_QUERIES_PER_DRIVER queries or a block page
+lucky_pool = DriverPool(lambda: headless_options(
+    {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.stylesheets": 2
+    },
+    ["--disable-dev-shm-usage", "--disable-software-rasterizer", "--mute-audio", "--disable-voice-input"]
+), on_launch=lambda driver: block_resources_cdp(driver, BlockPolicy()))
+
+class RejectedResult(ValueError):
+    """Google answered, but with a URL we do not accept (blacklisted or not HTTPS)."""
 
 # Google search logic
 def get_lucky_url(company_name, address, retries=2):
+    """(url, answered): answered is False when every attempt failed or was blocked, so the row is not cached."""
     attempt = 0
     while attempt <= retries:
-        driver = None
         try:
             time.sleep(randint(1, 3))
-            opts = Options()
-            opts.add_argument("headless=new")
-            opts.add_argument("--window-size=1280,800")
-            opts.add_argument("--disable-gpu")
-            opts.add_argument("--no-sandbox")
-            opts.add_argument("--log-level=3")
-            opts.add_argument("--disable-dev-shm-usage")
-            opts.add_argument("--disable-blink-features=AutomationControlled")
-            opts.add_argument("--disable-software-rasterizer")
-            opts.add_argument("--mute-audio")
-            opts.add_argument("--disable-logging")
-            opts.add_argument("--disable-voice-input")
-            opts.add_experimental_option("excludeSwitches", ["enable-automation"])
-            opts.add_experimental_option("useAutomationExtension", False)
-            opts.add_experimental_option("prefs", {
-                "profile.managed_default_content_settings.images": 2,
-                "profile.default_content_setting_values.stylesheets": 2
-            })
-
-            driver = webdriver.Chrome(
-                service=Service(ChromeDriverManager().install()),
-                options=opts
-            )
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            driver = lucky_pool.get()
             wait = WebDriverWait(driver, 10)
 
             driver.get("https://www.google.com")
@@ -102,63 +93,115 @@ def get_lucky_url(company_name, address, retries=2):
             time.sleep(3)
             final_url = driver.current_url
             if "sorry/index" in final_url or "interstitial" in driver.page_source.lower():
+                lucky_pool.recycle()  # blocked session: next attempt gets a fresh browser
                 raise ValueError("Google CAPTCHA or block")
 
-            final_url_lower = final_url.lower()
-            if any(bad in final_url_lower for bad in BLACKLIST):
-                raise ValueError("Blacklisted URL")
+            if domain_classifier.is_blocked(final_url):
+                raise RejectedResult("Blacklisted URL")
 
             # Reject any URL that is not HTTPS
             if not final_url.startswith("https://"):
-                raise ValueError("Non-HTTPS URL rejected")
+                raise RejectedResult("Non-HTTPS URL rejected")
 
-            return final_url
+            return final_url, True
 
-        except Exception:
+        except Exception as e:
+            # A slow page (TimeoutException) retries on the same browser
+            if isinstance(e, WebDriverException) and not isinstance(e, TimeoutException):
+                lucky_pool.recycle()  # crashed browser or lost session
             attempt += 1
             time.sleep(2)
             if attempt > retries:
-                return None
-        finally:
-            if driver:
-                try:
-                    driver.quit()
-                except:
-                    pass
-
-# Process one row
-def process_row(row):
-    if pd.isna(row["Name"]) or str(row["Name"]).strip() == "":
-        return (row.name, None)
-    if pd.notna(row["Website"]) and str(row["Website"]).strip() != "":
-        return (row.name, row["Website"])
-    url = get_lucky_url(row["Name"], row["Address"])
-    return (row.name, url if url else None)
-
-# Parallel execution with periodic autosaving
-with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-    futures = [executor.submit(process_row, row) for _, row in df.iterrows()]
+                return None, isinstance(e, RejectedResult)
+
+# Pre-pass before any search: websites found from custom email domains are journaled and never searched
+def journal_email_websites(done_keys, journal):
+    inferred_count = 0
+    for chunk in read_chunks():
+        if "Email" not in chunk.columns:
+            return
+        keys = row_keys(chunk)
+        todo = chunk["Website"].isna() & chunk["Email"].notna() & ~keys.isin(done_keys)
+        if not todo.any():
+            continue
+        inferred = websites_from_emails(chunk.loc[todo, "Email"], country_code, dns_cache).dropna()
+        for key, url in zip(keys[inferred.index], inferred):
+            if key not in done_keys:
+                done_keys.add(key)
+                journal.append(key, Website=url)
+                inferred_count += 1
+    print(f"📧 Websites inferred from email domains: {inferred_count}")
+
+# Rows to search, read lazily: named, without a website, not journaled yet
+def pending_rows(done_keys):
+    for chunk in read_chunks():
+        keys = row_keys(chunk)
+        named = chunk["Name"].notna() & (chunk["Name"].astype(str).str.strip() != "")
+        todo = named & chunk["Website"].isna() & ~keys.isin(done_keys)
+        for key, name, address in zip(keys[todo], chunk.loc[todo, "Name"], chunk.loc[todo, "Address"]):
+            if key not in done_keys:  # same practice listed twice: search once
+                done_keys.add(key)
+                yield key, name, address
+
+# Search one row: (url, answered), answered False when the search failed or was blocked
+def search_row(task):
+    _, name, address = task
+    cached = website_cache.get(name, address, country_code)
+    if cached is not None:
+        return cached[0], True
+    url, answered = get_lucky_url(name, address)
+    if answered:
+        website_cache.put(name, address, country_code, url, "google_lucky")
+    return url, answered
+
+def write_output(websites):
+    """Stream the input once more, fill in the journaled websites and write SAVE_PATH chunk by chunk."""
+    initial_missing = final_missing = 0
+    for i, chunk in enumerate(read_chunks()):
+        initial_missing += chunk["Website"].isna().sum()
+        chunk["Website"] = chunk["Website"].fillna(row_keys(chunk).map(websites))
+        final_missing += chunk["Website"].isna().sum()
+        chunk.to_csv(SAVE_PATH, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    return initial_missing, final_missing
+
+def main():
+    start_time = time.time()
+
+    journaled = AppendOnlyJournal.read(JOURNAL_PATH)
+    if not journaled.empty:
+        print(f"📒 Resuming: {len(journaled)} rows already searched in {JOURNAL_PATH}")
+    done_keys = set(journaled.index)
+
+    # Bounded parallel search; each answered result is appended to the journal right away
+    # (failed or blocked searches are not journaled, so a resumed run tries them again)
     completed = 0
-    for future in concurrent.futures.as_completed(futures):
-        idx, url = future.result()
-        if idx is not None:
-            df.at[idx, "Website"] = url
-        completed += 1
-        if completed % SAVE_INTERVAL == 0:
-            df.to_csv(AUTOSAVE_PATH, index=False)
-            print(f"💾 Autosave: {completed} rows processed and saved to: {AUTOSAVE_PATH}")
-
-# Final save
-df.to_csv(SAVE_PATH, index=False)
-
-# Report
-final_missing = df["Website"].isna().sum()
-filled_count = initial_missing - final_missing
-elapsed = time.time() - start_time
-minutes = int(elapsed // 60)
-seconds = int(elapsed % 60)
-
-print(f"✅ Website entries filled during this run: {filled_count}")
-print(f"🚫 Website entries still missing: {final_missing}")
-print(f"💾 Final data saved to: {SAVE_PATH}")
-print(f"⏱️ Total time elapsed: {minutes} minutes {seconds} seconds")
+    with AppendOnlyJournal(JOURNAL_PATH, ["Website"]) as journal:
+        journal_email_websites(done_keys, journal)
+        for (key, _, _), (url, answered) in stream_map(search_row, pending_rows(done_keys), MAX_WORKERS, MAX_IN_FLIGHT):
+            if answered:
+                journal.append(key, Website=url or "")
+            completed += 1
+            if completed % PROGRESS_INTERVAL == 0:
+                print(f"📝 {completed} rows searched and journaled to: {JOURNAL_PATH}")
+
+    lucky_pool.close_all()
+
+    # Final save
+    journaled = AppendOnlyJournal.read(JOURNAL_PATH)
+    websites = journaled["Website"].dropna() if "Website" in journaled else pd.Series(dtype=object)
+    initial_missing, final_missing = write_output(websites)
+    os.remove(JOURNAL_PATH)
+
+    # Report
+    filled_count = initial_missing - final_missing
+    elapsed = time.time() - start_time
+    minutes = int(elapsed // 60)
+    seconds = int(elapsed % 60)
+
+    print(f"✅ Website entries filled during this run: {filled_count}")
+    print(f"🚫 Website entries still missing: {final_missing}")
+    print(f"💾 Final data saved to: {SAVE_PATH}")
+    print(f"⏱️ Total time elapsed: {minutes} minutes {seconds} seconds")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import time
 from datetime import datetime
 import pandas as pd
 import numpy as np
@@ -15,6 +16,9 @@ from playwright.async_api import async_playwright
 from service_config import SERVICE_CONFIG
 from cookie_config import COOKIE_CONFIG
 from ua_config import USER_AGENTS_FIREFOX
+from resource_blocking import BlockPolicy, ResourceStats, block_resources_async
+from liveness import LivenessCache, SKIP_STATES, probe_urls_concurrent, start_url
+from journal import AppendOnlyJournal, row_keys
 import random
 
 # === Config ===
@@ -23,9 +27,15 @@ COUNTRY_DIR = "CHE"
 KEYWORD_DIR = "C:/Users/myuan/Desktop/VetMap/Keyword"
 INPUT_PATH = os.path.join(BASE_DIR, COUNTRY_DIR, "VP_website_filled.csv")
 OUTPUT_PATH = os.path.join(BASE_DIR, COUNTRY_DIR, "VP_filtered.csv")
+JOURNAL_PATH = os.path.join(BASE_DIR, COUNTRY_DIR, "VP_filtered_journal.csv")  # one line per processed row, for resuming
+RESULT_COLUMNS = ["Clinic", "Specialization", "Small Animals", "Large Animals", "Horses"]
 ANIMAL_KW_PATH = os.path.join(KEYWORD_DIR, "animal_keywords.csv")
 CLINIC_KW_PATH = os.path.join(KEYWORD_DIR, "vet_keywords.csv")
 NON_CLINIC_KW_PATH = os.path.join(KEYWORD_DIR, "nonclinic_keywords.csv")
+RESOURCE_STATS_PATH = os.path.join(BASE_DIR, COUNTRY_DIR, "resource_stats.csv")
+# Only page text is read: images, media, fonts and tracker/embed domains are aborted
+block_policy = BlockPolicy()
+resource_stats = ResourceStats("4_Category_Specialization", RESOURCE_STATS_PATH)
 #TEXT_OUT_DIR = os.path.join(BASE_DIR, COUNTRY_DIR, "VP_text_service")
 #os.makedirs(TEXT_OUT_DIR, exist_ok=True)
 
@@ -194,11 +204,14 @@ async def fetch_text(context, url, cookie_keywords):
     page = None
     try:
         page = await asyncio.wait_for(context.new_page(), timeout=30)
+        await block_resources_async(page, block_policy, resource_stats, url)
         try:
+            start = time.perf_counter()
             await asyncio.wait_for(page.goto(url, timeout=30000), timeout=60)
             await asyncio.sleep(1)
             await asyncio.wait_for(handle_cookie_banner(page, cookie_keywords), timeout=30)
             await asyncio.wait_for(page.wait_for_load_state("networkidle"), timeout=45)
+            resource_stats.record_load(url, time.perf_counter() - start)
             content = await asyncio.wait_for(page.content(), timeout=60)
             soup = BeautifulSoup(content, "html.parser")
             text = normalize_text(soup.get_text(separator=" ", strip=True))
@@ -207,6 +220,7 @@ async def fetch_text(context, url, cookie_keywords):
             # Ensure the page is closed only once and suppress any errors
             with contextlib.suppress(Exception):
                 await page.close()
+            resource_stats.discard(url)  # no-op after record_load; drops the counts of a failed page
     except Exception:
         with contextlib.suppress(Exception):
             if page:
@@ -214,7 +228,7 @@ async def fetch_text(context, url, cookie_keywords):
         return None, None
     
     
-async def process_row(context, row, animal_keywords_all, clinic_name, needs_spec=True):
+async def process_row(context, row, animal_keywords_all, clinic_name, row_key, needs_spec=True):
     url = str(row.get("Website", "")).strip()
     if not is_valid_url(url):
         return None
@@ -277,6 +291,7 @@ async def process_row(context, row, animal_keywords_all, clinic_name, needs_spec
     final_spec = ", ".join(spec) if needs_spec and spec else str(row.get("Specialization", "")).lower()
 
     result = {
+        "Key": row_key,
         "Name": clinic_name,
         "Website": url,
         "Clinic": clinic_status,
@@ -290,7 +305,7 @@ async def process_row(context, row, animal_keywords_all, clinic_name, needs_spec
         print(f"⚠️ {clinic_name}: No species keywords matched")
     return result
 
-async def process_batch(batch_idx, batch, df, animal_keywords_all):
+async def process_batch(batch_idx, batch, animal_keywords_all, journal):
     async def init_browser():
         user_agent = random.choice(USER_AGENTS_FIREFOX)
         browser = await p.firefox.launch(headless=True)
@@ -317,13 +332,14 @@ async def process_batch(batch_idx, batch, df, animal_keywords_all):
                 print(f"⏭️  {clinic_name}: Skipped (Clinic already set to '{clinic_val}')")
                 continue
 
+            row_key = row["Row_Key"]
             needs_spec = bool(row.get("Needs_Spec", True))
             out = None
 
             for attempt in range(3):
                 try:
                     out = await asyncio.wait_for(
-                        process_row(context, row, animal_keywords_all, clinic_name, needs_spec=needs_spec),
+                        process_row(context, row, animal_keywords_all, clinic_name, row_key, needs_spec=needs_spec),
                         timeout=120
                     )
                     break
@@ -339,21 +355,16 @@ async def process_batch(batch_idx, batch, df, animal_keywords_all):
                         break
                     await asyncio.sleep(5)
 
-            df["Name_norm"] = df["Name"].apply(sanitize_filename)
-            target = sanitize_filename(clinic_name)
-            idx = df[df["Name_norm"] == target].index
-
             if out is None:
                 print(f"❌ {clinic_name}: Fetch failed — page not retrievable after 3 retries")
-                if not idx.empty:
-                    df.loc[idx[0], "Clinic"] = "uncertain"
+                journal.append(row_key, Clinic="uncertain")
                 continue
 
             # Retry specialization if needed
             if needs_spec and out.get("Specialization_Reason") == "no_species_match":
                 try:
                     retry_out = await asyncio.wait_for(
-                        process_row(context, row, animal_keywords_all, clinic_name, needs_spec=needs_spec),
+                        process_row(context, row, animal_keywords_all, clinic_name, row_key, needs_spec=needs_spec),
                         timeout=120
                     )
                     if retry_out and retry_out.get("Specialization") and retry_out.get("Specialization_Reason") != "no_species_match":
@@ -361,28 +372,17 @@ async def process_batch(batch_idx, batch, df, animal_keywords_all):
                 except Exception:
                     pass
 
-            # Save results to DataFrame
-            if not idx.empty:
-                for col in ["Clinic", "Specialization", "Small Animals", "Large Animals", "Horses"]:
-                    df.loc[idx[0], col] = out.get(col, pd.NA)
-            else:
-                print(f"⚠️ No match found in input for {clinic_name}")
+            # Commit the row's result right away, under the key it was read with
+            journal.append(out["Key"], **{col: out.get(col, "") for col in RESULT_COLUMNS})
 
-        # Save entire DataFrame once per batch
-        df.drop(columns="Name_norm", inplace=True, errors="ignore")
-        df.sort_index(inplace=True)
-        df.reset_index(drop=True, inplace=True)
-        df.to_csv(OUTPUT_PATH, index=False)
-        print(f"💾 Batch {batch_idx} saved to {OUTPUT_PATH}")
+        print(f"💾 Batch {batch_idx} journaled to {JOURNAL_PATH}")
 
         await context.close()
         await browser.close()
 
-        if "Clinic_norm" in df.columns:
-            df.drop(columns="Clinic_norm", inplace=True)
-
 
 async def Spec_service():
+    run_start = time.time()
     df = pd.read_csv(INPUT_PATH)
     df["Clinic"] = df["Clinic"].astype("string").str.strip().str.lower()    
     df.reset_index(drop=True, inplace=True)
@@ -391,15 +391,30 @@ async def Spec_service():
     # Mark Clinic as 'uncertain' for rows with missing or invalid websites
     invalid_url_mask = ~df["Website"].apply(is_valid_url)
     df.loc[invalid_url_mask, "Clinic"] = "uncertain"
+    # HTTP pre-pass (liveness.py, cached): dead and parked sites are not opened in the browser,
+    # the others start from their canonical URL after redirects
+    to_check = ~invalid_url_mask & ~df["Clinic"].isin(["yes", "no"])
+    liveness = await asyncio.to_thread(probe_urls_concurrent, df.loc[to_check, "Website"], LivenessCache())
+    probes = df["Website"].where(to_check).map(lambda u: liveness.get(str(u).strip()) if pd.notna(u) else None)
+    unreachable = probes.map(lambda r: r is not None and r["state"] in SKIP_STATES).astype(bool)
+    reachable = probes.notna() & ~unreachable
+    df.loc[unreachable, "Clinic"] = "uncertain"
+    df.loc[reachable, "Website"] = probes[reachable].map(start_url)
+    print(f"🩺 Skipping {unreachable.sum()} dead or parked websites")
     for col in ["Specialization", "Small Animals", "Large Animals", "Horses"]:
         if col not in df.columns:
             df[col] = np.nan
-    df_to_process = df[df['Website'].notna()].copy()
+    # === Resume logic: rows already in the journal are not processed again ===
+    keys = row_keys(df)
+    journaled = AppendOnlyJournal.read(JOURNAL_PATH)
+    if not journaled.empty:
+        print(f"🔄 Resuming from journal: {len(journaled)} rows already processed ({JOURNAL_PATH})")
+    df_to_process = df[df['Website'].notna() & ~unreachable & ~keys.isin(journaled.index)].copy()
+    df_to_process["Row_Key"] = keys[df_to_process.index]
     # Normalize Clinic column to lowercase strings
     df_to_process["Clinic_norm"] = df_to_process["Clinic"].astype(str).str.strip().str.lower()
     # Only process rows where Clinic is missing or invalid
     df_to_process = df_to_process[~df_to_process["Clinic_norm"].isin(["yes", "no"])].copy()
-    df_to_process.reset_index(drop=True, inplace=True)
     # Determine if specialization detection is needed
     df_to_process["Needs_Spec"] = df_to_process["Specialization"].isna()
     # 🔢 Show number of rows to process
@@ -416,10 +431,18 @@ async def Spec_service():
         async with semaphore:
             await process_batch(*args)
 
-    tasks = [limited_process_batch(i, batch, df, animal_keywords_all) for i, batch in enumerate(batches)]
-    await asyncio.gather(*tasks)
-
-    df_final = pd.read_csv(OUTPUT_PATH).sort_index()
+    # Both concurrent batches only append to the journal; the dataframe is not touched until the end
+    with AppendOnlyJournal(JOURNAL_PATH, RESULT_COLUMNS) as journal:
+        tasks = [limited_process_batch(i, batch, animal_keywords_all, journal) for i, batch in enumerate(batches)]
+        await asyncio.gather(*tasks)
+
+    # Materialize the output once: journaled results onto the input rows
+    # (empty journal values, e.g. of failed fetches, keep the input value)
+    journaled = AppendOnlyJournal.read(JOURNAL_PATH)
+    df_final = df.copy()
+    for col in RESULT_COLUMNS:
+        values = keys.map(journaled[col])
+        df_final[col] = values.where(values.notna(), df_final[col].astype(object))
     spec_after = df_final['Specialization'].notna().sum()
     print(f"📌 Before processing: {spec_before} rows with Specialization")
     print(f"📌 After processing: {spec_after} rows with Specialization")
@@ -440,10 +463,14 @@ async def Spec_service():
         print(f"No:        {summary['no']}")
         print(f"Uncertain: {summary['uncertain']}")
 
+    print(resource_stats.summary(since=run_start))
+
     df["Clinic"] = df["Clinic"].fillna("uncertain")
     df_final = df_final[~df_final["Clinic"].str.lower().eq("no")]
     df_final.to_csv(OUTPUT_PATH, index=False)
     print(f"✅ Done. Saved to {OUTPUT_PATH}")
+    os.remove(JOURNAL_PATH)
+    print(f"🗑️ Removed journal: {JOURNAL_PATH}")
 
 if __name__ == "__main__":
     asyncio.run(Spec_service())
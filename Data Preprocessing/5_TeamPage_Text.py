@@ -9,6 +9,8 @@ import time
 from difflib import SequenceMatcher
 from PIL import Image
 from team_config import TEAM_CONFIG
+from resource_blocking import BlockPolicy, ResourceStats, block_resources_sync
+from liveness import LivenessCache, SKIP_STATES, probe_urls_concurrent, start_url
 import langid
 import concurrent.futures
 from rapidfuzz import fuzz
@@ -24,7 +26,11 @@ OUTPUT_FOLDER = os.path.join(BASE_DIR, COUNTRY_DIR, "VP_text_image")
 LARGE_FOLDER = os.path.join(BASE_DIR, COUNTRY_DIR, "VP_text_large")
 # Create the directory if it doesn't exist
 os.makedirs(OUTPUT_FOLDER, exist_ok=True) 
+RESOURCE_STATS_PATH = os.path.join(BASE_DIR, COUNTRY_DIR, "resource_stats.csv")
 SIMILARITY_THRESHOLD = 85
+# Images stay allowed: the screenshot fallback is read by 7_Image_to_Text_GPT.py
+block_policy = BlockPolicy(allow_types={"image"})
+resource_stats = ResourceStats("5_TeamPage_Text", RESOURCE_STATS_PATH)
 non_html_extensions = (
         ".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp",
         ".pdf", ".doc", ".docx", ".xls", ".xlsx",
@@ -626,6 +632,8 @@ def scrape_team_content(website, practice_name, output_dir, max_attempts=2):
             with sync_playwright() as p:
                 browser = p.chromium.launch(headless=True)
                 page = browser.new_page(viewport={"width": 1920, "height": 1080})
+                block_resources_sync(page, block_policy, resource_stats, website)
+                site_start = time.perf_counter()
 
                 retry(lambda: page.goto(website, timeout=50000))
                 page.wait_for_load_state("load")
@@ -657,6 +665,7 @@ def scrape_team_content(website, practice_name, output_dir, max_attempts=2):
                         content_text = f"TEAM PAGE: {team_page}\n{'='*80}\n{team_content}"
 
                         if not is_valid_content(content_text):
+                            resource_stats.record_load(website, time.perf_counter() - site_start)
                             return  # Skip short, invalid or junk content                     
                         else:
                             with open(txt_path, 'w', encoding='utf-8') as f:
@@ -664,7 +673,9 @@ def scrape_team_content(website, practice_name, output_dir, max_attempts=2):
                     elif is_page_visually_nonempty(page):
                         take_screenshot_as_fallback(page, png_path)
                     else:
+                        resource_stats.record_load(website, time.perf_counter() - site_start)
                         return
+                resource_stats.record_load(website, time.perf_counter() - site_start)
                 browser.close()
                 return  # Success: exit the retry loop
 
@@ -708,6 +719,8 @@ def run_batch(csv_path, output_dir, max_workers=4, chunksize=100, timeout=300):
     
     total_processed = 0
     chunk_index = 0
+    skipped_dead = 0
+    liveness_cache = LivenessCache()  # opened here, not at import: the worker processes re-import this module
     print(f"🚀 Starting batch processing")
 
     with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
@@ -718,6 +731,17 @@ def run_batch(csv_path, output_dir, max_workers=4, chunksize=100, timeout=300):
                 for _, row in chunk.iterrows()
                 if pd.notna(row["Website"]) and str(row["Website"]).strip() != ""
             ]
+            # Dead and parked sites are skipped; the others start from their canonical URL (liveness.py)
+            liveness = probe_urls_concurrent([website for website, _, _ in tasks], liveness_cache)
+            live_tasks = []
+            for website, name, out_dir in tasks:
+                probe = liveness.get(website)
+                if probe is None:
+                    live_tasks.append((website, name, out_dir))
+                elif probe["state"] not in SKIP_STATES:
+                    live_tasks.append((start_url(probe), name, out_dir))
+            skipped_dead += len(tasks) - len(live_tasks)
+            tasks = live_tasks
             if not tasks:
                 continue
             print(f"\n📦 Processing chunk {chunk_index} — {len(tasks)} valid sites")
@@ -727,7 +751,9 @@ def run_batch(csv_path, output_dir, max_workers=4, chunksize=100, timeout=300):
             total_processed += len(tasks)
 
     elapsed = time.time() - batch_start_time
+    print(f"🩺 Skipped {skipped_dead} dead or parked websites")
     print(f"\n✅ Finished {total_processed} sites in {elapsed:.2f}s → Avg: {elapsed / max(total_processed, 1):.2f}s/site (parallel)")
+    print(resource_stats.summary(since=batch_start_time))
 
 if __name__ == "__main__":
     run_batch(INPUT_FILE, OUTPUT_FOLDER, max_workers=4, chunksize=100)
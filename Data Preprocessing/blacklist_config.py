@@ -81,3 +81,27 @@ BLACKLIST = [
     # 🇺🇸 United States
     "healthgrades", "webmd", "ratemds", "wellness"
 ]
+
+# Whole hosts that are never a practice website (matched exactly, with or without "www.")
+NETLOC_BLOCKLIST = {
+    # 🔗 Messaging platforms
+    "wa.me", "web.whatsapp.com", "t.me", "telegram.me", "signal.org", "messenger.com",
+
+    # 🔗 URL shorteners & redirectors
+    "bit.ly", "tinyurl.com", "shorturl.at", "rebrand.ly", "goo.gl",
+    "t.co", "fb.me", "lnkd.in", "shorte.st", "ow.ly", "buff.ly",
+    "smarturl.it", "is.gd", "v.gd", "s.id", "cutt.ly", "rb.gy",
+
+    # 📧 Regional webmail / ISP mail hosts (email domains that are not a practice website)
+    "bluewin.ch", "hispeed.ch", "swissonline.ch", "sunrise.ch", "web.de", "t-online.de", "freenet.de",
+    "orange.fr", "free.fr", "wanadoo.fr", "laposte.net", "libero.it", "tiscali.it", "alice.it"
+}
+
+# Distinctive platform names that also block when they are only part of a host label
+# (e.g. "de-ch.facebook" or "praxis.wixsite"); BLACKLIST terms otherwise match whole labels only
+SUBSTRING_BLACKLIST = [
+    "facebook", "instagram", "linkedin", "tripadvisor", "trustpilot",
+    "wixsite", "jimdosite", "godaddysites", "blogspot", "wordpress", "squarespace", "webnode",
+    "gelbeseiten", "pagesjaunes", "paginegialle", "paginasamarillas", "yellowpages",
+    "goldenpages", "telefoonboek", "stadtbranchenbuch", "kennstdueinen", "moneyhouse",
+]
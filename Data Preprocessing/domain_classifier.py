@@ -0,0 +1,71 @@
+import pandas as pd
+import tldextract
+from blacklist_config import BLACKLIST, NETLOC_BLOCKLIST, SUBSTRING_BLACKLIST
+from keyword_matcher import build_trie_regex
+
+HOST_PATTERN = r"^[a-zA-Z][a-zA-Z0-9+.-]*://(?:[^@/?#]*@)?([^/:?#]+)"
+
+# ===================================================================
+# === DOMAIN CLASSIFIER ===
+# ===================================================================
+
+class DomainClassifier:
+    """
+    One verdict for "is this URL an acceptable practice website", shared by all
+    website stages. A host is blocked when
+    - it is in NETLOC_BLOCKLIST (exact, with or without "www."),
+    - its registered-domain label or one of its subdomain labels is a BLACKLIST
+      term (exact label, so "rt" blocks rt.com but not tierarzt.ch),
+    - one of its labels contains a SUBSTRING_BLACKLIST term (one compiled trie regex).
+    Verdicts are computed once per distinct host.
+    """
+    def __init__(self, terms=BLACKLIST, netlocs=NETLOC_BLOCKLIST, substrings=SUBSTRING_BLACKLIST):
+        self.labels = {t.lower() for t in terms}
+        self.netlocs = {n.lower() for n in netlocs}
+        self.substrings = build_trie_regex(sorted({s.lower() for s in substrings})) if substrings else None
+        self.verdicts = {}
+
+    def host_verdict(self, host):
+        """'' for an acceptable host, otherwise the reason it is blocked."""
+        verdict = self.verdicts.get(host)
+        if verdict is None:
+            verdict = self._classify_host(host)
+            self.verdicts[host] = verdict
+        return verdict
+
+    def _classify_host(self, host):
+        if not host:
+            return "no host"
+        bare = host[4:] if host.startswith("www.") else host
+        if host in self.netlocs or bare in self.netlocs:
+            return f"netloc:{bare}"
+        extracted = tldextract.extract(host)
+        labels = [extracted.domain] + [p for p in extracted.subdomain.split(".") if p]
+        for label in labels:
+            if label in self.labels:
+                return f"label:{label}"
+        if self.substrings is not None:
+            for label in labels:
+                match = self.substrings.search(label)
+                if match:
+                    return f"substring:{match.group(0)}"
+        return ""
+
+    def classify(self, urls):
+        """Verdict per URL for a whole column: '' = acceptable; missing URLs stay NaN."""
+        urls = pd.Series(urls)
+        hosts = urls.astype("string").str.strip().str.lower().str.extract(HOST_PATTERN, expand=False)
+        verdicts = {h: self.host_verdict(h) for h in hosts.dropna().unique()}
+        result = hosts.map(verdicts).astype(object)
+        result[hosts.isna() & urls.notna()] = "no host"
+        return result
+
+    def blocked(self, urls):
+        """Boolean mask of blocked URLs; missing URLs are not blocked."""
+        verdicts = self.classify(urls)
+        return verdicts.notna() & (verdicts != "")
+
+    def is_blocked(self, url):
+        return bool(self.blocked([url]).iloc[0])
+
+domain_classifier = DomainClassifier()
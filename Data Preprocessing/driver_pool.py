@@ -0,0 +1,126 @@
+import sys
+import time
+import threading
+from functools import lru_cache
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+# === CONFIGURATION ===
+MAX_QUERIES_PER_DRIVER = 50  # fresh browser (cookies, fingerprint) after this many queries
+BENCHMARK_URL = "about:blank"
+
+# ===================================================================
+# === DRIVER BINARY ===
+# ===================================================================
+
+@lru_cache(maxsize=None)
+def resolve_driver_path():
+    """ChromeDriverManager check/download, done once per process instead of once per query."""
+    path = ChromeDriverManager().install()
+    print(f"🧭 Using chromedriver at {path}")
+    return path
+
+def headless_options(prefs=None, extra_args=()):
+    """Headless Chrome options shared by the website-finding scripts."""
+    opts = Options()
+    opts.add_argument("headless=new")
+    opts.add_argument("--window-size=1280,800")
+    opts.add_argument("--disable-gpu")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument("--log-level=3")  # Suppress most Chrome logs
+    opts.add_argument("--disable-logging")
+    opts.add_argument("--disable-blink-features=AutomationControlled")
+    for arg in extra_args:
+        opts.add_argument(arg)
+    opts.add_experimental_option("excludeSwitches", ["enable-logging", "enable-automation"])
+    opts.add_experimental_option("useAutomationExtension", False)
+    if prefs:
+        opts.add_experimental_option("prefs", prefs)
+    return opts
+
+def launch_driver(options):
+    driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=options)
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    return driver
+
+# ===================================================================
+# === DRIVER POOL ===
+# ===================================================================
+
+class DriverPool:
+    """
+    One long-lived Chrome per worker thread. A driver is replaced after
+    max_queries uses or after recycle(), which callers use on a CAPTCHA page
+    or a WebDriverException other than a timeout (a slow page keeps its
+    browser). close_all() quits every driver at the end.
+    """
+    def __init__(self, options_factory, max_queries=MAX_QUERIES_PER_DRIVER, on_launch=None):
+        self.options_factory = options_factory
+        self.max_queries = max_queries
+        self.on_launch = on_launch  # e.g. resource_blocking.block_resources_cdp
+        self.local = threading.local()
+        self.drivers = set()
+        self.lock = threading.Lock()
+        self.launched = 0
+
+    def _quit(self, driver):
+        with self.lock:
+            self.drivers.discard(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def recycle(self):
+        """Drop the current thread's browser; the next query starts a new one."""
+        driver = getattr(self.local, "driver", None)
+        if driver is not None:
+            self._quit(driver)
+        self.local.driver = None
+
+    def get(self):
+        if getattr(self.local, "driver", None) is None or self.local.uses >= self.max_queries:
+            self.recycle()
+            self.local.driver = launch_driver(self.options_factory())
+            if self.on_launch:
+                self.on_launch(self.local.driver)
+            self.local.uses = 0
+            with self.lock:
+                self.drivers.add(self.local.driver)
+                self.launched += 1
+        self.local.uses += 1
+        return self.local.driver
+
+    def close_all(self):
+        with self.lock:
+            drivers = list(self.drivers)
+        for driver in drivers:
+            self._quit(driver)
+
+# ===================================================================
+# === BENCHMARK ===
+# ===================================================================
+
+def benchmark(n_queries=30, url=BENCHMARK_URL):
+    """Queries/minute: new Chrome + driver-manager check per query vs one pooled driver."""
+    start = time.perf_counter()
+    for _ in range(n_queries):
+        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=headless_options())
+        driver.get(url)
+        driver.quit()
+    per_query = time.perf_counter() - start
+    print(f"⏱️ New driver per query: {n_queries / per_query * 60:.1f} queries/min")
+
+    pool = DriverPool(headless_options, max_queries=MAX_QUERIES_PER_DRIVER)
+    start = time.perf_counter()
+    for _ in range(n_queries):
+        pool.get().get(url)
+    pooled = time.perf_counter() - start
+    pool.close_all()
+    print(f"⏱️ Pooled driver ({pool.launched} launches): {n_queries / pooled * 60:.1f} queries/min "
+          f"({per_query / pooled:.1f}x)")
+
+if __name__ == "__main__":
+    benchmark(*(int(a) for a in sys.argv[1:2]))
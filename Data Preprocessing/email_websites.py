@@ -0,0 +1,86 @@
+import threading
+import requests
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from domain_classifier import domain_classifier
+from url_validator import clean_urls
+
+# === CONFIGURATION ===
+MAX_WORKERS = 32
+REQUEST_TIMEOUT = 6
+HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; VetMap website check)"}
+EMAIL_DOMAIN_PATTERN = r"@([a-z0-9](?:[a-z0-9-]*[a-z0-9])?(?:\.[a-z0-9](?:[a-z0-9-]*[a-z0-9])?)+)"
+
+# ===================================================================
+# === EMAIL DOMAINS ===
+# ===================================================================
+# info@tierarzt-xyz.ch almost always means https://www.tierarzt-xyz.ch. Webmail
+# and ISP domains (gmail, outlook, bluewin, ...) are rejected by the same
+# domain classifier the search stages use for their results.
+
+def email_domains(emails):
+    """Domain of the first non-webmail address in each Email value (NaN if there is none)."""
+    emails = pd.Series(emails)
+    found = emails.astype("string").str.lower().str.extractall(EMAIL_DOMAIN_PATTERN)[0]
+    found = found.str.replace(r"^www\.", "", regex=True)
+    found = found[~domain_classifier.blocked("https://" + found)]
+    first = found.groupby(level=0).first()
+    return first.reindex(emails.index).astype(object)
+
+# ===================================================================
+# === HTTP CHECK ===
+# ===================================================================
+
+_local = threading.local()
+
+def _session():
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+        _local.session.headers.update(HEADERS)
+    return _local.session
+
+def _answers(url):
+    """Final URL after redirects if url serves an HTML page, else None. HEAD first, GET if HEAD is refused."""
+    session = _session()
+    try:
+        response = session.head(url, allow_redirects=True, timeout=REQUEST_TIMEOUT)
+        if response.status_code in (403, 405, 501) or response.status_code >= 500:
+            response = session.get(url, allow_redirects=True, timeout=REQUEST_TIMEOUT, stream=True)
+            response.close()
+    except requests.RequestException:
+        return None
+    content_type = response.headers.get("Content-Type", "text/html").lower()
+    if response.status_code >= 400 or "html" not in content_type:
+        return None
+    return response.url
+
+def probe_domain(domain):
+    """First of https://www.<domain>, https://<domain>, http://www.<domain> that answers with a page."""
+    for url in (f"https://www.{domain}/", f"https://{domain}/", f"http://www.{domain}/"):
+        final_url = _answers(url)
+        if final_url and not domain_classifier.is_blocked(final_url):
+            return final_url
+    return None
+
+# ===================================================================
+# === COLUMN-LEVEL INFERENCE ===
+# ===================================================================
+
+def websites_from_emails(emails, country_tld, dns_cache=None, max_workers=MAX_WORKERS):
+    """
+    Candidate website for each Email value, or None. Each distinct domain is
+    checked once: webmail, foreign ccTLD and non-resolving domains are dropped
+    without a request (url_validator.clean_urls, shared DNS cache), the rest are
+    requested concurrently.
+    """
+    domains = email_domains(emails)
+    distinct = pd.Series(domains.dropna().unique())
+    if distinct.empty:
+        return pd.Series([None] * len(domains), index=domains.index, dtype=object)
+    valid = clean_urls("https://" + distinct + "/", country_tld, dns_cache).notna().to_numpy()
+    candidates = distinct[valid].tolist()
+    print(f"📧 {domains.notna().sum()} non-webmail email domains, {len(distinct)} distinct, {len(candidates)} to check over HTTP")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        sites = dict(zip(candidates, executor.map(probe_domain, candidates)))
+    return domains.map(sites).astype(object).where(lambda s: s.notna(), None)
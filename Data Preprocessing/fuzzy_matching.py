@@ -0,0 +1,202 @@
+import re
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz
+from rapidfuzz.process import cdist, cpdist
+from sklearn.neighbors import BallTree
+from keyword_matcher import normalize_series
+
+# === CONFIGURATION ===
+MIN_TOKEN_LENGTH = 3        # shorter name tokens are not used as blocking keys
+MAX_BLOCK_SIZE = 500        # keys shared by more right-hand rows are too common to block on
+CELL_SIZE_DEG = 0.01        # ~1 km spatial cells; neighbouring cells are searched too
+CHUNK_ROWS = 5_000          # left-hand rows whose candidate pairs are scored together
+CHUNK_CELLS = 20_000_000    # score cells per dense cdist chunk (float32 → ~80 MB)
+EARTH_RADIUS_METERS = 6371000
+POSTCODE_PATTERN = re.compile(r"\b\d{4,5}\b")
+
+# ===================================================================
+# === BLOCKING KEYS ===
+# ===================================================================
+# Two records are only scored when they share a key: a name token, a postcode
+# from the address, or a ~1 km grid cell. token_sort_ratio >= 85 needs most
+# tokens in common, so true matches practically always share a rare name token
+# or a postcode, and the work stays close to linear in the number of records.
+
+def _token_keys(names):
+    tokens = normalize_series(names).str.findall(rf"[a-z0-9]{{{MIN_TOKEN_LENGTH},}}")
+    return ("tok:" + tokens.explode().dropna()).rename("key")
+
+def _postcode_keys(addresses):
+    codes = pd.Series(addresses).astype(str).str.findall(POSTCODE_PATTERN)
+    return ("plz:" + codes.explode().dropna()).rename("key")
+
+def _cell_keys(lats, lons, neighbours=False):
+    lats = pd.to_numeric(pd.Series(lats), errors="coerce")
+    lons = pd.to_numeric(pd.Series(lons), errors="coerce").reindex(lats.index)
+    valid = lats.notna() & lons.notna()
+    if not valid.any():
+        return pd.Series(dtype=object, name="key")
+    ilat = np.floor(lats[valid] / CELL_SIZE_DEG).astype(np.int64)
+    ilon = np.floor(lons[valid] / CELL_SIZE_DEG).astype(np.int64)
+    offsets = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1)] if neighbours else [(0, 0)]
+    parts = [
+        "cell:" + (ilat + dy).astype(str) + ":" + (ilon + dx).astype(str)
+        for dy, dx in offsets
+    ]
+    return pd.concat(parts).rename("key")
+
+def blocking_keys(df, name_col, address_col, neighbours=False):
+    """
+    Long Series of blocking keys indexed by row position. With neighbours=True the
+    8 surrounding grid cells are added, so the query side reaches across cell edges.
+    """
+    df = df.reset_index(drop=True)
+    parts = [_token_keys(df[name_col]), _postcode_keys(df[address_col])]
+    if "Latitude" in df.columns and "Longitude" in df.columns:
+        parts.append(_cell_keys(df["Latitude"], df["Longitude"], neighbours))
+    return pd.concat(parts).rename_axis("row").reset_index().drop_duplicates()
+
+# ===================================================================
+# === MATCHING ===
+# ===================================================================
+
+def candidate_pairs(left_keys, right_keys):
+    """(left, right) row-position pairs that share at least one usable key."""
+    pairs = left_keys.merge(right_keys, on="key", suffixes=("_left", "_right"))
+    return (
+        pairs[["row_left", "row_right"]]
+        .drop_duplicates()
+        .rename(columns={"row_left": "left", "row_right": "right"})
+    )
+
+def score_pairs(left_texts, right_texts, pairs, scorer=fuzz.token_sort_ratio, score_cutoff=0):
+    """Score candidate pairs element-wise, on all cores; scores under the cutoff are 0."""
+    if pairs.empty:
+        return np.empty(0, dtype=np.float32)
+    return cpdist(
+        left_texts[pairs["left"].to_numpy()],
+        right_texts[pairs["right"].to_numpy()],
+        scorer=scorer,
+        score_cutoff=score_cutoff,
+        workers=-1,
+    )
+
+def best_matches(left_df, right_df, name_col, address_col, threshold, scorer=fuzz.token_sort_ratio):
+    """
+    For each left row, the best right row among its blocked candidates with a
+    score >= threshold. Ties go to the lower right position, as np.argmax does.
+    Returns a DataFrame with columns left, right, score (row positions).
+    """
+    left_df = left_df.reset_index(drop=True)
+    right_df = right_df.reset_index(drop=True)
+    left_texts = (left_df[name_col].astype(str) + " " + left_df[address_col].astype(str)).to_numpy()
+    right_texts = (right_df[name_col].astype(str) + " " + right_df[address_col].astype(str)).to_numpy()
+
+    right_keys = blocking_keys(right_df, name_col, address_col)
+    key_sizes = right_keys["key"].value_counts()
+    right_keys = right_keys[right_keys["key"].map(key_sizes) <= MAX_BLOCK_SIZE]
+    left_keys = blocking_keys(left_df, name_col, address_col, neighbours=True)
+
+    results = []
+    for _, chunk_keys in left_keys.groupby(left_keys["row"] // CHUNK_ROWS):
+        pairs = candidate_pairs(chunk_keys, right_keys)
+        pairs["score"] = score_pairs(left_texts, right_texts, pairs, scorer, threshold)
+        pairs = pairs[pairs["score"] >= threshold]
+        results.append(
+            pairs.sort_values(["left", "score", "right"], ascending=[True, False, True])
+                 .drop_duplicates(subset="left")
+        )
+    if not results:
+        return pd.DataFrame(columns=["left", "right", "score"])
+    return pd.concat(results, ignore_index=True)
+
+def match_one_to_one(left_df, right_df, name_col, address_col, threshold, scorer=fuzz.token_sort_ratio):
+    """
+    One-to-one assignment in left-row order: each left row takes its best right
+    row unless an earlier left row already took it (then it stays unmatched).
+    """
+    matches = best_matches(left_df, right_df, name_col, address_col, threshold, scorer)
+    return matches.sort_values("left").drop_duplicates(subset="right", keep="first").reset_index(drop=True)
+
+# ===================================================================
+# === MATCH AGAINST A REFERENCE LIST ===
+# ===================================================================
+
+def matches_any(queries, choices, score_cutoff, scorer=fuzz.token_sort_ratio):
+    """
+    Boolean mask: True where a query scores >= score_cutoff against at least one
+    choice. Dense cdist, in row chunks of at most CHUNK_CELLS cells, on all cores.
+    """
+    queries = np.asarray(queries, dtype=object)
+    choices = list(choices)
+    mask = np.zeros(len(queries), dtype=bool)
+    if len(queries) == 0 or not choices:
+        return mask
+    rows = max(1, CHUNK_CELLS // len(choices))
+    for start in range(0, len(queries), rows):
+        scores = cdist(queries[start:start + rows], choices, scorer=scorer, score_cutoff=score_cutoff, workers=-1)
+        mask[start:start + rows] = (scores >= score_cutoff).any(axis=1)
+    return mask
+
+def nearby_pairs(left_coords, right_coords, radius_m):
+    """(left, right) row-position pairs closer than radius_m; coords are (lat, lon) arrays in degrees."""
+    if len(left_coords) == 0 or len(right_coords) == 0:
+        return pd.DataFrame({"left": np.empty(0, dtype=np.int64), "right": np.empty(0, dtype=np.int64)})
+    tree = BallTree(np.radians(right_coords), metric="haversine")
+    neighbours = tree.query_radius(np.radians(left_coords), r=radius_m / EARTH_RADIUS_METERS)
+    counts = np.fromiter((len(nb) for nb in neighbours), dtype=np.int64, count=len(neighbours))
+    return pd.DataFrame({
+        "left": np.repeat(np.arange(len(neighbours)), counts),
+        "right": np.concatenate(neighbours).astype(np.int64),
+    })
+
+def _coords(df):
+    if "Latitude" not in df.columns or "Longitude" not in df.columns:
+        return np.full((len(df), 2), np.nan)
+    return np.column_stack([
+        pd.to_numeric(df["Latitude"], errors="coerce").to_numpy(dtype=float),
+        pd.to_numeric(df["Longitude"], errors="coerce").to_numpy(dtype=float),
+    ])
+
+def reference_match_mask(df, reference_df, name_col, address_col,
+                         combined_cutoff=85, address_cutoff=90, radius_m=None,
+                         scorer=fuzz.token_sort_ratio):
+    """
+    Mask of df rows that match any reference row, either on "name address"
+    (>= combined_cutoff) or on the address alone (>= address_cutoff).
+
+    With radius_m, rows that have coordinates are only compared with reference
+    rows within radius_m; rows or reference entries without coordinates are
+    still compared with everything on the other side.
+    """
+    combined = (df[name_col].astype(str) + " " + df[address_col].astype(str)).to_numpy()
+    addresses = df[address_col].astype(str).to_numpy()
+    ref_combined = (reference_df[name_col].astype(str) + " " + reference_df[address_col].astype(str)).to_numpy()
+    ref_addresses = reference_df[address_col].astype(str).to_numpy()
+
+    def dense(rows, ref_rows):
+        return (matches_any(combined[rows], ref_combined[ref_rows], combined_cutoff, scorer)
+                | matches_any(addresses[rows], ref_addresses[ref_rows], address_cutoff, scorer))
+
+    if radius_m is None:
+        return pd.Series(dense(slice(None), slice(None)), index=df.index)
+
+    coords, ref_coords = _coords(df), _coords(reference_df)
+    located = ~np.isnan(coords).any(axis=1)
+    ref_located = ~np.isnan(ref_coords).any(axis=1)
+    mask = np.zeros(len(df), dtype=bool)
+
+    # Rows with coordinates: reference rows nearby
+    rows, ref_rows = np.flatnonzero(located), np.flatnonzero(ref_located)
+    pairs = nearby_pairs(coords[rows], ref_coords[ref_rows], radius_m)
+    pairs["left"], pairs["right"] = rows[pairs["left"]], ref_rows[pairs["right"]]
+    hit = ((score_pairs(combined, ref_combined, pairs, scorer, combined_cutoff) >= combined_cutoff)
+           | (score_pairs(addresses, ref_addresses, pairs, scorer, address_cutoff) >= address_cutoff))
+    mask[pairs["left"].to_numpy()[hit]] = True
+
+    # Everything that cannot be placed is compared densely
+    mask[rows] |= dense(rows, np.flatnonzero(~ref_located))
+    unlocated = np.flatnonzero(~located)
+    mask[unlocated] |= dense(unlocated, slice(None))
+    return pd.Series(mask, index=df.index)
@@ -0,0 +1,175 @@
+import os
+import sys
+import csv
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+# Shared rate limiter lives in rate_limiter.py at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rate_limiter import RateLimiter
+
+# === CONFIGURATION ===
+# Shared across countries and reruns: the same directory addresses recur a lot
+GEOCODE_CACHE_PATH = "C:/Users/myuan/Desktop/VetMap_Data/geocode_cache.csv"
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
+NOMINATIM_RPS = float(os.getenv("NOMINATIM_RPS", "1"))    # public instance policy: 1 request/s
+GOOGLE_RPS = float(os.getenv("GOOGLE_GEOCODE_RPS", "10"))
+GOOGLE_OVERFLOW = True  # send queries to Google while Nominatim is throttled, not only after a miss
+MAX_WORKERS = 8
+REQUEST_TIMEOUT = 10
+
+# Google location_type → confidence; Nominatim uses its own importance score
+GOOGLE_CONFIDENCE = {"ROOFTOP": 1.0, "RANGE_INTERPOLATED": 0.8, "GEOMETRIC_CENTER": 0.6, "APPROXIMATE": 0.4}
+
+def normalize_query(query):
+    """Case and whitespace folded, so 'Bahnhofstr. 1,  Bern' and 'bahnhofstr. 1, bern' share one request."""
+    return " ".join(str(query).lower().replace(",", ", ").split()).strip(" ,")
+
+# ===================================================================
+# === PROVIDERS ===
+# ===================================================================
+# Each provider returns (lat, lon, confidence), NOT_FOUND when it has no result
+# for the query, or None when the request itself failed.
+NOT_FOUND = ()
+
+def geocode_nominatim(query, user_agent):
+    url = f"{NOMINATIM_URL.rstrip('/')}/search"
+    params = {"q": query, "format": "json", "limit": 1}
+    try:
+        response = requests.get(url, params=params, headers={"User-Agent": user_agent}, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        data = response.json()
+        if data:
+            return float(data[0]["lat"]), float(data[0]["lon"]), float(data[0].get("importance") or 0)
+        return NOT_FOUND
+    except Exception as e:
+        print(f"❌ OSM error for '{query}': {e}")
+    return None
+
+def geocode_google(query, api_key):
+    url = "https://maps.googleapis.com/maps/api/geocode/json"
+    try:
+        response = requests.get(url, params={"address": query, "key": api_key}, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        result = response.json()
+        if result["status"] == "OK":
+            geometry = result["results"][0]["geometry"]
+            location = geometry["location"]
+            return location["lat"], location["lng"], GOOGLE_CONFIDENCE.get(geometry.get("location_type"), 0.5)
+        if result["status"] == "ZERO_RESULTS":
+            return NOT_FOUND
+    except Exception as e:
+        print(f"❌ Google error for '{query}': {e}")
+    return None
+
+class Provider:
+    def __init__(self, name, rate, lookup):
+        self.name = name
+        self.limiter = RateLimiter(rate)
+        self.lookup = lookup
+
+# ===================================================================
+# === QUERY CACHE ===
+# ===================================================================
+
+class GeocodeCache:
+    """
+    Normalized query → (lat, lon, provider, confidence), appended to a CSV as
+    results arrive. Queries no provider could place are stored with empty
+    coordinates and provider "none", so reruns do not ask again.
+    """
+    fields = ["query", "lat", "lon", "provider", "confidence"]
+
+    def __init__(self, path=GEOCODE_CACHE_PATH):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    if row["lat"] and row["lon"]:
+                        self.entries[row["query"]] = (float(row["lat"]), float(row["lon"]), row["provider"], float(row["confidence"]))
+                    else:
+                        self.entries[row["query"]] = (None, None, row["provider"], 0.0)
+            print(f"📇 Loaded {len(self.entries)} cached geocoding results from {path}")
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(self.fields)
+
+    def __contains__(self, query):
+        return query in self.entries
+
+    def get(self, query):
+        return self.entries.get(query)
+
+    def add(self, query, result):
+        self.entries[query] = result
+        lat, lon, provider, confidence = result
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow([query, "" if lat is None else lat, "" if lon is None else lon, provider, confidence])
+
+# ===================================================================
+# === GEOCODER ===
+# ===================================================================
+
+class Geocoder:
+    """
+    Geocodes distinct normalized queries concurrently. Every provider keeps its
+    own rate limit; a query goes to the first provider (Nominatim) when it has a
+    free slot, otherwise to any other provider with a free slot (Google
+    overflow), otherwise it waits for the earliest slot. A query that the chosen
+    provider cannot place is retried on the remaining providers.
+    """
+    def __init__(self, user_agent, google_api_key=None, cache=None, overflow=GOOGLE_OVERFLOW, max_workers=MAX_WORKERS):
+        self.providers = [Provider("nominatim", NOMINATIM_RPS, lambda q: geocode_nominatim(q, user_agent))]
+        if google_api_key:
+            self.providers.append(Provider("google", GOOGLE_RPS, lambda q: geocode_google(q, google_api_key)))
+        self.cache = cache if cache is not None else GeocodeCache()
+        self.overflow = overflow
+        self.max_workers = max_workers
+
+    def _pick_provider(self):
+        candidates = self.providers if self.overflow else self.providers[:1]
+        for provider in candidates:
+            if provider.limiter.try_acquire():
+                return provider
+        provider = min(candidates, key=lambda p: p.limiter.next_slot)
+        provider.limiter.wait()
+        return provider
+
+    def geocode_one(self, query):
+        """(lat, lon, provider, confidence); provider is "none" if nobody found it, "error" if a request failed."""
+        first = self._pick_provider()
+        failed = False
+        for provider in [first] + [p for p in self.providers if p is not first]:
+            if provider is not first:
+                provider.limiter.wait()
+            result = provider.lookup(query)
+            if result:
+                return (*result[:2], provider.name, result[2])
+            failed = failed or result is None
+        return (None, None, "error" if failed else "none", 0.0)
+
+    def geocode_all(self, queries, on_result=None):
+        """
+        Return {normalized query: (lat, lon, provider, confidence)} for the given
+        queries. Cached queries are answered without a request; the rest are
+        sent once each. on_result(query, result) is called in the calling thread
+        as results arrive.
+        """
+        keys = {normalize_query(q) for q in queries if q}
+        results = {k: self.cache.get(k) for k in keys if k in self.cache}
+        pending = sorted(keys - results.keys())
+        print(f"🌍 {len(keys)} distinct queries: {len(results)} cached, {len(pending)} to geocode "
+              f"with {', '.join(p.name for p in self.providers)}")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.geocode_one, q): q for q in pending}
+            for future in as_completed(futures):
+                query = futures[future]
+                result = future.result()
+                if result[2] != "error":  # failed requests are retried on the next run
+                    self.cache.add(query, result)
+                results[query] = result
+                if on_result:
+                    on_result(query, result)
+        return results
@@ -0,0 +1,57 @@
+import os
+import csv
+import hashlib
+import threading
+import pandas as pd
+
+# ===================================================================
+# === APPEND-ONLY RESULT JOURNAL ===
+# ===================================================================
+# Long-running stages record each finished row as one small CSV line instead
+# of rewriting the whole dataframe. A rerun reads only the journal, applies it,
+# and continues with the rows that are not in it yet.
+
+def row_keys(df, columns=("Name", "Address")):
+    """Stable row identifier: sha1 of the given columns, independent of row order and index."""
+    parts = [df[col].fillna("").astype(str) for col in columns]
+    text = parts[0].str.cat(parts[1:], sep="|")
+    return text.map(lambda t: hashlib.sha1(t.encode("utf-8")).hexdigest())
+
+class AppendOnlyJournal:
+    """
+    CSV journal of (key, *fields) records. Each append is written and flushed
+    right away; the file handle stays open for the whole run.
+    """
+    def __init__(self, path, fields):
+        self.path = path
+        self.fields = ["key"] + list(fields)
+        self.lock = threading.Lock()
+        new_file = not os.path.exists(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "a", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        if new_file:
+            self.writer.writerow(self.fields)
+            self.file.flush()
+
+    def append(self, key, **values):
+        with self.lock:
+            self.writer.writerow([key] + [values.get(f, "") for f in self.fields[1:]])
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def read(path):
+        """Journal records as a DataFrame indexed by key; the last record per key wins."""
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        records = pd.read_csv(path, dtype={"key": str})
+        return records.drop_duplicates(subset="key", keep="last").set_index("key")
@@ -0,0 +1,62 @@
+import re
+import unicodedata
+import pandas as pd
+
+# ===================================================================
+# === COMPILED KEYWORD MATCHING ===
+# ===================================================================
+
+def normalize_text(text):
+    return unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode().lower().strip()
+
+def normalize_series(values):
+    """normalize_text applied to a whole column with pandas string methods."""
+    return (
+        pd.Series(values).astype(str)
+        .str.normalize("NFKD")
+        .str.encode("ascii", "ignore")
+        .str.decode("ascii")
+        .str.lower()
+        .str.strip()
+    )
+
+def build_trie_regex(terms):
+    """
+    Compile literal terms into one regex shaped like a character trie, so terms
+    sharing a prefix are tested together instead of one alternative at a time.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # end of term
+
+    def to_pattern(node):
+        branches = [re.escape(ch) + to_pattern(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return re.compile(to_pattern(trie))
+
+class KeywordMatcher:
+    """
+    Keyword list normalized and compiled once; match() flags every name that
+    contains one of the keywords, for a whole column in one pass.
+
+    The previous per-keyword test was `keyword in name and
+    fuzz.partial_ratio(keyword, name) >= 85`. partial_ratio is 100 whenever the
+    keyword is a substring of the name, so the substring hit alone decides and
+    no fuzzy scoring is needed for the hits.
+    """
+    def __init__(self, keywords):
+        self.keywords = sorted({normalize_text(k) for k in keywords} - {""})
+        self.pattern = build_trie_regex(self.keywords) if self.keywords else None
+
+    def match(self, names):
+        names = pd.Series(names)
+        if self.pattern is None:
+            return pd.Series(False, index=names.index)
+        return normalize_series(names).str.contains(self.pattern)
@@ -0,0 +1,205 @@
+import os
+import re
+import csv
+import sys
+import socket
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+import requests
+import pandas as pd
+
+# === CONFIGURATION ===
+# One cache shared by the browser stages (4_Category_Specialization.py, 5_TeamPage_Text.py) and across countries
+LIVENESS_CACHE_PATH = "C:/Users/myuan/Desktop/VetMap_Data/liveness_cache.csv"
+REQUEST_TIMEOUT = 10
+MAX_CONCURRENT_PROBES = 32
+SNIFF_BYTES = 64_000  # start of the page read to recognise parked domains
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) Gecko/20100101 Firefox/128.0",
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+}
+
+# How long a verdict is trusted before the site is probed again
+STATE_TTL_SECONDS = {
+    "live": 14 * 24 * 3600,
+    "parked": 7 * 24 * 3600,
+    "dead": 7 * 24 * 3600,
+    "error": 24 * 3600,
+}
+# Sites in these states are not opened in a browser at all
+SKIP_STATES = {"dead", "parked"}
+# The site is gone (bot walls such as 401/403/429/503 still count as live: a browser may pass them)
+DEAD_STATUSES = {404, 410}
+# getaddrinfo errors meaning the host does not exist (NXDOMAIN), not a temporary lookup failure
+NXDOMAIN_ERRNOS = {socket.EAI_NONAME, getattr(socket, "EAI_NODATA", socket.EAI_NONAME)}
+BOT_WALL_STATUSES = {401, 403, 429, 503}
+
+# Domain parking / for-sale services a parked domain redirects to
+PARKING_HOSTS = {
+    "sedo.com", "sedoparking.com", "parkingcrew.net", "bodis.com", "above.com", "dan.com",
+    "afternic.com", "hugedomains.com", "undeveloped.com", "uniregistry.com", "domainmarket.com",
+    "parklogic.com", "voodoo.com",
+}
+PARKED_TEXT_PATTERN = re.compile("|".join([
+    r"this domain (?:name )?(?:is|may be) for sale", r"buy this domain", r"domain (?:is )?parked",
+    r"parked free,? courtesy of", r"sedoparking", r"parkingcrew",
+    r"diese domain (?:steht|ist) zum verkauf", r"domaine (?:est )?[àa] vendre", r"dominio in vendita",
+    r"welcome to nginx!", r"apache2 \w+ default page", r"default web site page",
+]), re.IGNORECASE)
+
+# ===================================================================
+# === SINGLE PROBE ===
+# ===================================================================
+
+_local = threading.local()
+
+def _session():
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+        _local.session.headers.update(HEADERS)
+    return _local.session
+
+def _is_parking_host(host):
+    labels = (host or "").lower().split(".")
+    return any(".".join(labels[i:]) in PARKING_HOSTS for i in range(len(labels) - 1))
+
+def _host_missing(url):
+    """True only if DNS says the host does not exist; temporary lookup failures are not proof of a dead site."""
+    try:
+        socket.getaddrinfo(urlparse(url).hostname, None)
+    except socket.gaierror as e:
+        return e.errno in NXDOMAIN_ERRNOS
+    except (UnicodeError, OSError, TypeError):
+        return False
+    return False
+
+def probe_url(url):
+    """
+    GET the URL once, following redirects, and read only the start of the body.
+    Returns url, final_url (canonical URL after redirects), status, content_type,
+    seconds and state: live, parked, dead (host does not exist, 404/410), error
+    (refused connection, TLS error, redirect loop, other HTTP errors: retried
+    after a day and still opened in the browser), or timeout (not cached).
+    """
+    result = {"url": url, "final_url": "", "status": "", "content_type": "", "seconds": "", "state": "error"}
+    start = time.perf_counter()
+    try:
+        with _session().get(url, allow_redirects=True, timeout=REQUEST_TIMEOUT, stream=True) as response:
+            head = next(response.iter_content(SNIFF_BYTES), b"") if "html" in response.headers.get("Content-Type", "") else b""
+            result.update(final_url=response.url, status=response.status_code,
+                          content_type=response.headers.get("Content-Type", "").split(";")[0].strip().lower())
+    except requests.Timeout:
+        result["state"] = "timeout"
+        return result
+    except requests.ConnectionError:
+        result["seconds"] = round(time.perf_counter() - start, 2)
+        if _host_missing(url):
+            result["state"] = "dead"
+        return result  # refused connection, TLS error, outage: may be temporary
+    except (requests.RequestException, UnicodeError):
+        result["seconds"] = round(time.perf_counter() - start, 2)
+        return result  # redirect loop, invalid URL
+    result["seconds"] = round(time.perf_counter() - start, 2)
+
+    status = result["status"]
+    if status in DEAD_STATUSES:
+        result["state"] = "dead"
+    elif _is_parking_host(urlparse(result["final_url"]).hostname) or PARKED_TEXT_PATTERN.search(head.decode("utf-8", "ignore")):
+        result["state"] = "parked"
+    elif status < 400 or status in BOT_WALL_STATUSES:
+        result["state"] = "live"
+    else:
+        result["state"] = "error"
+    return result
+
+def start_url(result):
+    """Where a browser should start: the canonical URL, or its homepage if that is not an HTML page."""
+    final_url = result["final_url"] or result["url"]
+    if result["content_type"] and "html" not in result["content_type"]:
+        parsed = urlparse(final_url)
+        return f"{parsed.scheme}://{parsed.netloc}/"
+    return final_url
+
+# ===================================================================
+# === LIVENESS CACHE ===
+# ===================================================================
+
+class LivenessCache:
+    """
+    URL → probe result, appended to a CSV as results arrive (the last record
+    per URL wins). Entries expire after STATE_TTL_SECONDS of their state;
+    timeouts are never stored, so a slow network does not mark sites as dead.
+    """
+    fields = ["url", "final_url", "status", "content_type", "seconds", "state", "checked_at"]
+
+    def __init__(self, path=LIVENESS_CACHE_PATH):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    row["status"] = int(row["status"]) if row["status"] else ""
+                    row["checked_at"] = float(row["checked_at"])
+                    self.entries[row["url"]] = row
+            print(f"📇 Loaded {len(self.entries)} cached website probes from {path}")
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(self.fields)
+
+    def get(self, url, now=None):
+        """The cached result if still fresh, else None."""
+        entry = self.entries.get(url)
+        if entry is None or (now or time.time()) - entry["checked_at"] > STATE_TTL_SECONDS.get(entry["state"], 0):
+            return None
+        return entry
+
+    def put(self, result, now=None):
+        if result["state"] not in STATE_TTL_SECONDS:
+            return
+        entry = dict(result, checked_at=now or time.time())
+        with self.lock:
+            self.entries[entry["url"]] = entry
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow([entry[field] for field in self.fields])
+
+# ===================================================================
+# === CONCURRENT PRE-PASS ===
+# ===================================================================
+
+def probe_urls_concurrent(urls, cache=None, max_concurrent=MAX_CONCURRENT_PROBES):
+    """
+    {url: probe result} for every distinct http(s) URL. Fresh cache entries are
+    used as is; the rest are probed with blocking requests on a thread pool of
+    max_concurrent workers and cached as they finish. Blocks until all are done;
+    4_Category_Specialization.py runs it in a worker thread (asyncio.to_thread).
+    """
+    urls = {u.strip() for u in pd.Series(urls).dropna().astype(str) if u.strip().lower().startswith(("http://", "https://"))}
+    results = {}
+    if cache is not None:
+        for url in urls:
+            cached = cache.get(url)
+            if cached is not None:
+                results[url] = cached
+    pending = sorted(urls - results.keys())
+    if pending:
+        print(f"🩺 Probing {len(pending)} websites ({len(results)} from cache)")
+        with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
+            for future in as_completed([executor.submit(probe_url, u) for u in pending]):
+                result = future.result()
+                if cache is not None:
+                    cache.put(result)
+                results[result["url"]] = result
+    states = pd.Series([r["state"] for r in results.values()], dtype=object).value_counts()
+    print("🩺 Website states: " + ", ".join(f"{state} {n}" for state, n in states.items()))
+    return results
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python liveness.py <url> [<url> ...]")
+    else:
+        for result in probe_urls_concurrent(sys.argv[1:]).values():
+            print(f"{result['state']:>8}  {result['status']!s:>3}  {result['seconds']!s:>5}s  {result['url']} → {start_url(result)}")
@@ -0,0 +1,10 @@
+MERGE_SOURCES = {
+    # 🇨🇭 Switzerland
+    "CHE": [
+        {"source": "OSM", "path": "C:/Users/myuan/Desktop/CHE/OSM/CHE_VP_OSM.csv"},
+        {"source": "LocalCH", "path": "C:/Users/myuan/Desktop/CHE/LocalCH/vet_practices.csv"},
+        {"source": "GST", "path": "C:/Users/myuan/Desktop/CHE/GST/vet_practices.csv"},
+        # Add more sources
+    ],
+    # Add more countries
+}
@@ -0,0 +1,246 @@
+import os
+import csv
+import sys
+import time
+import threading
+from collections import Counter
+from urllib.parse import urlparse
+
+# === CONFIGURATION ===
+# Resource types (Playwright request.resource_type) aborted by default
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+# Analytics, ads, trackers, embeds and font/map CDNs: nothing a text scraper needs
+BLOCKED_DOMAINS = {
+    # 📊 Analytics & tag managers
+    "google-analytics.com", "googletagmanager.com", "analytics.google.com",
+    "hotjar.com", "clarity.ms", "mouseflow.com", "matomo.cloud", "segment.io", "mixpanel.com",
+    # 📢 Ads & social tracking pixels
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "adservice.google.com",
+    "facebook.net", "connect.facebook.net", "snap.licdn.com", "ads.linkedin.com",
+    "bat.bing.com", "analytics.tiktok.com", "static.ads-twitter.com", "criteo.com", "taboola.com",
+    # 🎬 Video & map embeds
+    "youtube.com", "youtube-nocookie.com", "ytimg.com", "googlevideo.com",
+    "player.vimeo.com", "vimeocdn.com", "maps.googleapis.com", "maps.gstatic.com",
+    # 🔤 Web font CDNs
+    "fonts.googleapis.com", "fonts.gstatic.com", "use.typekit.net", "use.fontawesome.com",
+}
+
+# File extensions of the same resource types, for Chrome's Network.setBlockedURLs (no resource types there)
+TYPE_URL_PATTERNS = {
+    "image": [".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif", ".svg", ".ico", ".bmp"],
+    "media": [".mp4", ".webm", ".mov", ".mp3", ".m4a", ".ogg", ".wav"],
+    "font": [".woff", ".woff2", ".ttf", ".otf", ".eot"],
+}
+
+# Typical transfer size per aborted request: a guess of the bytes saved, not a measurement
+# (the benchmark below measures real savings per site)
+ESTIMATED_BYTES = {
+    "image": 60_000, "media": 500_000, "font": 35_000,
+    "script": 40_000, "stylesheet": 20_000, "xhr": 5_000, "fetch": 5_000, "other": 5_000,
+}
+
+# ===================================================================
+# === POLICY ===
+# ===================================================================
+
+class BlockPolicy:
+    """
+    What a stage aborts: BLOCKED_RESOURCE_TYPES and BLOCKED_DOMAINS minus the
+    stage's allowlist. The Playwright route handlers never block navigations
+    (the page itself); Chrome's Network.setBlockedURLs does, see block_resources_cdp.
+    """
+    def __init__(self, allow_types=(), allow_domains=(), extra_domains=()):
+        self.types = set(BLOCKED_RESOURCE_TYPES) - set(allow_types)
+        self.domains = (set(BLOCKED_DOMAINS) | set(extra_domains)) - set(allow_domains)
+
+    def blocks_host(self, host):
+        """True if the host or any parent domain of it is blocked."""
+        labels = (host or "").lower().split(".")
+        return any(".".join(labels[i:]) in self.domains for i in range(len(labels) - 1))
+
+    def blocks(self, url, resource_type):
+        return resource_type in self.types or self.blocks_host(urlparse(url).hostname)
+
+    def cdp_patterns(self, domains=False):
+        """The policy as wildcard URL patterns for Network.setBlockedURLs; domain patterns only if asked for."""
+        # Extension at the end of the path only, so hosts like www.movie.ch are not matched
+        patterns = [p for t in sorted(self.types) for ext in TYPE_URL_PATTERNS.get(t, []) for p in (f"*{ext}", f"*{ext}?*")]
+        if domains:
+            for domain in sorted(self.domains):
+                patterns += [f"*://{domain}/*", f"*.{domain}/*"]
+        return patterns
+
+# ===================================================================
+# === PER-SITE STATISTICS ===
+# ===================================================================
+
+def estimated_bytes(counts):
+    """Guessed bytes saved for a Counter of blocked resource types."""
+    return sum(ESTIMATED_BYTES.get(t, ESTIMATED_BYTES["other"]) * n for t, n in counts.items())
+
+class ResourceStats:
+    """
+    Aborted requests and load time per site, appended to a CSV (one line per
+    site; the processes of a stage may all append to the same file).
+    estimated_bytes_saved is a guess from ESTIMATED_BYTES; the measured_* columns
+    are only filled by benchmark(), which loads each site with and without blocking.
+    """
+    fields = ["stage", "site", "recorded_at", "blocked_requests", "blocked_types", "estimated_bytes_saved", "seconds",
+              "measured_bytes_saved", "measured_seconds_saved"]
+
+    def __init__(self, stage, path=None):
+        self.stage = stage
+        self.path = path
+        self.blocked = {}
+        self.lock = threading.Lock()
+
+    def record_block(self, site, resource_type):
+        with self.lock:
+            self.blocked.setdefault(site, Counter())[resource_type] += 1
+
+    def discard(self, site):
+        """The site failed: forget its counts without writing a line."""
+        with self.lock:
+            self.blocked.pop(site, None)
+
+    def record_load(self, site, seconds, measured_bytes_saved="", measured_seconds_saved=""):
+        """The site is done: write its line with the requests blocked so far and the seconds it took."""
+        with self.lock:
+            counts = self.blocked.pop(site, Counter())
+            est_bytes = estimated_bytes(counts)
+            if not self.path:
+                return
+            new_file = not os.path.exists(self.path)
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(self.fields)
+                writer.writerow([self.stage, site, time.time(), sum(counts.values()),
+                                 " ".join(f"{t}:{n}" for t, n in counts.most_common()), est_bytes, round(seconds, 2),
+                                 measured_bytes_saved, measured_seconds_saved if measured_seconds_saved == "" else round(measured_seconds_saved, 2)])
+
+    def summary(self, since=0):
+        """
+        Totals over the lines this stage recorded since the given time, plus the
+        savings measured by benchmark() on sites of the same file, if any.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return f"🧱 {self.stage}: no resource statistics recorded"
+        sites = blocked = est_bytes = 0
+        seconds = 0.0
+        measured_sites = measured_bytes = 0
+        measured_seconds = 0.0
+        with open(self.path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if row["stage"] == self.stage and float(row["recorded_at"]) >= since:
+                    sites += 1
+                    blocked += int(row["blocked_requests"])
+                    est_bytes += int(row.get("estimated_bytes_saved", row.get("est_bytes_saved")))  # column name before the rename
+                    seconds += float(row["seconds"])
+                if row.get("measured_bytes_saved"):
+                    measured_sites += 1
+                    measured_bytes += int(row["measured_bytes_saved"])
+                    measured_seconds += float(row["measured_seconds_saved"])
+        line = (f"🧱 {self.stage}: {blocked} requests blocked on {sites} sites, "
+                f"~{est_bytes / 1e6:.1f} MB saved (estimated), avg {seconds / max(sites, 1):.1f}s per site")
+        if measured_sites:
+            line += (f"; measured by benchmark on {measured_sites} sites: avg {measured_bytes / measured_sites / 1e3:.0f} kB "
+                     f"and {measured_seconds / measured_sites:.2f}s saved per site")
+        return line
+
+# ===================================================================
+# === BROWSER HOOKS ===
+# ===================================================================
+# Each route handler watches one page, so blocked requests are attributed to
+# the URL that page was opened for (`site`).
+
+async def block_resources_async(page, policy, stats=None, site=None):
+    """Install the policy on a Playwright async page (or context)."""
+    async def handler(route):
+        request = route.request
+        if not request.is_navigation_request() and policy.blocks(request.url, request.resource_type):
+            if stats is not None:
+                stats.record_block(site, request.resource_type)
+            await route.abort()
+        else:
+            await route.continue_()
+    await page.route("**/*", handler)
+
+def block_resources_sync(page, policy, stats=None, site=None):
+    """Install the policy on a Playwright sync page (or context)."""
+    def handler(route):
+        request = route.request
+        if not request.is_navigation_request() and policy.blocks(request.url, request.resource_type):
+            if stats is not None:
+                stats.record_block(site, request.resource_type)
+            route.abort()
+        else:
+            route.continue_()
+    page.route("**/*", handler)
+
+def block_resources_cdp(driver, policy, domains=False):
+    """
+    Install the policy on a Selenium Chrome driver through the DevTools protocol.
+    Network.setBlockedURLs has no resource types and blocks top-level navigations
+    too: a page whose URL matches a pattern does not load at all. Blocked domains
+    are therefore left out unless `domains` is set, which only suits drivers that
+    never navigate to third-party sites (3_Web_Finding.py reads result links from
+    the search page; 3_Web_Luckybtn.py follows the result and must not set it).
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": policy.cdp_patterns(domains)})
+
+# ===================================================================
+# === BENCHMARK ===
+# ===================================================================
+
+def _measure(browser, url, policy=None, stats=None):
+    """Seconds until the load event and bytes received for one page load."""
+    context = browser.new_context()
+    page = context.new_page()
+    if policy is not None:
+        block_resources_sync(page, policy, stats, url)
+    received = []
+    page.on("requestfinished", lambda request: received.append(request.sizes()["responseBodySize"]))
+    start = time.perf_counter()
+    page.goto(url, wait_until="load", timeout=60000)
+    seconds = time.perf_counter() - start
+    context.close()
+    return seconds, sum(received)
+
+def benchmark(urls, policy=None, stats_path=None):
+    """
+    Load each site without and with the policy and print the bytes and load time
+    saved. With stats_path the measured savings are also appended to that
+    resource_stats.csv (stage "benchmark"), where the stage summaries report them.
+    """
+    from playwright.sync_api import sync_playwright
+    policy = policy or BlockPolicy()
+    stats = ResourceStats("benchmark", stats_path)
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        for url in urls:
+            try:
+                full_s, full_b = _measure(browser, url)
+                blocked_s, blocked_b = _measure(browser, url, policy, stats)
+            except Exception as e:
+                stats.discard(url)
+                print(f"❌ {url}: {e}")
+                continue
+            est_bytes = estimated_bytes(stats.blocked.get(url, Counter()))
+            stats.record_load(url, blocked_s, full_b - blocked_b, full_s - blocked_s)
+            print(f"⏱️ {url}: {full_b / 1e3:.0f} → {blocked_b / 1e3:.0f} kB, "
+                  f"{full_s:.2f} → {blocked_s:.2f}s (saved {full_b - blocked_b:,} bytes, {full_s - blocked_s:.2f}s; "
+                  f"estimate {est_bytes:,} bytes)")
+        browser.close()
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    stats_path = None
+    if len(args) >= 2 and args[0] == "--stats":
+        stats_path, args = args[1], args[2:]
+    if not args:
+        print("Usage: python resource_blocking.py [--stats <resource_stats.csv>] <url> [<url> ...]")
+    else:
+        benchmark(args, stats_path=stats_path)
@@ -0,0 +1,109 @@
+import os
+import sys
+import threading
+import requests
+# Shared rate limiter lives in rate_limiter.py at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rate_limiter import RateLimiter
+
+# === CONFIGURATION ===
+# Self-hosted SearXNG metasearch instance (needs "json" in search.formats of its settings.yml)
+SEARXNG_URL = os.getenv("SEARXNG_URL", "http://localhost:8888")
+SEARXNG_ENGINES = os.getenv("SEARXNG_ENGINES", "")     # e.g. "google,bing,duckduckgo"; empty = instance default
+SEARXNG_RPS = float(os.getenv("SEARXNG_RPS", "5"))
+SEARCH_TOP_K = 5
+REQUEST_TIMEOUT = 10
+
+# ===================================================================
+# === BACKEND INTERFACE ===
+# ===================================================================
+
+class SearchBackend:
+    """
+    search(query, k) returns up to k result URLs in rank order ([] when the
+    engine has no results) and raises when the search itself failed.
+    """
+    name = "backend"
+
+    def available(self):
+        return True
+
+    def search(self, query, k=SEARCH_TOP_K):
+        raise NotImplementedError
+
+class FunctionBackend(SearchBackend):
+    """Wraps a search(query, k) function, e.g. the Selenium search of 3_Web_Finding.py."""
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+
+    def search(self, query, k=SEARCH_TOP_K):
+        return self.func(query, k)
+
+# ===================================================================
+# === HTTP BACKEND ===
+# ===================================================================
+
+class SearxngBackend(SearchBackend):
+    """SearXNG JSON API: one small HTTP request per query, no browser."""
+    name = "searxng"
+
+    def __init__(self, base_url=SEARXNG_URL, engines=SEARXNG_ENGINES, rate=SEARXNG_RPS):
+        self.url = f"{base_url.rstrip('/')}/search"
+        self.engines = engines
+        self.limiter = RateLimiter(rate)
+        self.local = threading.local()  # one requests.Session per worker thread
+
+    def _session(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def available(self):
+        try:
+            self.search("test", 1)
+            return True
+        except Exception as e:
+            print(f"⚠️ {self.name} not available at {self.url}: {e}")
+            return False
+
+    def search(self, query, k=SEARCH_TOP_K):
+        params = {"q": query, "format": "json"}
+        if self.engines:
+            params["engines"] = self.engines
+        self.limiter.wait()
+        response = self._session().get(self.url, params=params, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        urls = [r.get("url", "") for r in response.json().get("results", [])]
+        return [u for u in urls if u.startswith(("http://", "https://"))][:k]
+
+# ===================================================================
+# === BACKEND CHAIN ===
+# ===================================================================
+
+def active_backends(backends):
+    """Backends that answer a health check, in the given order."""
+    active = [b for b in backends if b.available()]
+    print(f"🔎 Search backends: {' → '.join(b.name for b in active) or 'none'}")
+    return active
+
+def search_first(backends, query, is_allowed=lambda url: True, k=SEARCH_TOP_K):
+    """
+    First allowed URL among the top-k results, and the backend that found it.
+    The next backend is only asked when the previous one failed or returned no
+    results at all; results that are all rejected count as an answer (not found).
+    """
+    for backend in backends:
+        try:
+            candidates = backend.search(query, k)
+        except Exception as e:
+            print(f"⚠️ {backend.name} failed for '{query}': {e}")
+            continue
+        if candidates:
+            return next((url for url in candidates if is_allowed(url)), None), backend.name
+    return None, None
+
+if __name__ == "__main__":
+    backend = SearxngBackend()
+    for url in backend.search(" ".join(sys.argv[1:]) or "Tierarztpraxis Bern"):
+        print(url)
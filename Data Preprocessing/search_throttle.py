@@ -0,0 +1,103 @@
+import time
+import threading
+from random import uniform
+
+# === CONFIGURATION ===
+START_CONCURRENCY = 1          # parallel queries per engine at start and after a block
+SUCCESS_STREAK = 10            # clean results in a row before one more parallel query is allowed
+MIN_INTERVAL_SECONDS = (1.0, 2.0)   # jittered gap between two query starts on the same engine
+BASE_COOLDOWN_SECONDS = 60     # pause after the first block; doubles with every further block
+MAX_COOLDOWN_SECONDS = 30 * 60
+
+# ===================================================================
+# === PER-ENGINE CONTROLLER ===
+# ===================================================================
+
+class EngineController:
+    """
+    Thread-safe throttle for one search engine (AIMD):
+    - a query runs only while fewer than `limit` queries are in flight;
+    - every SUCCESS_STREAK clean results in a row raise the limit by one, up to max_concurrency;
+    - a block (CAPTCHA / interstitial) halves the limit and pauses the engine
+      for a cool-down that doubles with each block in a row;
+    - after the cool-down a single probe query is let through; only when it
+      succeeds does the engine return to its (halved) limit.
+    """
+    def __init__(self, name, max_concurrency, start_concurrency=START_CONCURRENCY,
+                 success_streak=SUCCESS_STREAK, min_interval=MIN_INTERVAL_SECONDS,
+                 base_cooldown=BASE_COOLDOWN_SECONDS, max_cooldown=MAX_COOLDOWN_SECONDS):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.limit = min(start_concurrency, max_concurrency)
+        self.success_streak = success_streak
+        self.min_interval = min_interval
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.cond = threading.Condition()
+        self.in_flight = 0
+        self.streak = 0
+        self.blocks_in_row = 0
+        self.cooldown_until = 0.0
+        self.probing = False
+        self.next_start = 0.0
+        self.stats = {"success": 0, "block": 0, "error": 0}
+
+    def cooldown_remaining(self):
+        with self.cond:
+            return max(0.0, self.cooldown_until - time.monotonic())
+
+    def _current_limit(self):
+        return 1 if self.probing else self.limit
+
+    def acquire(self, timeout=None):
+        """
+        Wait for a query slot on this engine. Returns False right away while the
+        engine cools down, or when no slot freed up within `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while True:
+                now = time.monotonic()
+                if now < self.cooldown_until:
+                    return False
+                if self.in_flight < self._current_limit() and now >= self.next_start:
+                    self.in_flight += 1
+                    self.next_start = now + uniform(*self.min_interval)
+                    return True
+                wait = self.next_start - now if self.in_flight < self._current_limit() else None
+                if deadline is not None:
+                    if now >= deadline:
+                        return False
+                    wait = min(wait or deadline - now, deadline - now)
+                self.cond.wait(wait)
+
+    def release(self, outcome="success"):
+        """outcome: "success" (result page read), "block" (CAPTCHA/interstitial) or "error"."""
+        with self.cond:
+            self.in_flight -= 1
+            self.stats[outcome] += 1
+            if outcome == "block":
+                self.blocks_in_row += 1
+                self.streak = 0
+                self.limit = max(1, self.limit // 2)
+                cooldown = min(self.base_cooldown * 2 ** (self.blocks_in_row - 1), self.max_cooldown)
+                self.cooldown_until = time.monotonic() + cooldown
+                self.probing = True
+                print(f"[BLOCKED] {self.name}: block #{self.blocks_in_row} in a row, "
+                      f"cooling down {cooldown:.0f}s, then probing with limit {self.limit}")
+            elif outcome == "success" and time.monotonic() >= self.cooldown_until:
+                # (queries that started before a block and finish during its cool-down do not count)
+                if self.probing:
+                    print(f"✅ {self.name}: probe succeeded, resuming with {self.limit} parallel queries")
+                self.probing = False
+                self.blocks_in_row = 0
+                self.streak += 1
+                if self.streak >= self.success_streak and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self.streak = 0
+                    print(f"📈 {self.name}: raising to {self.limit} parallel queries")
+            self.cond.notify_all()
+
+    def summary(self):
+        with self.cond:
+            return f"{self.name}: limit {self.limit}, " + ", ".join(f"{k} {v}" for k, v in self.stats.items())
@@ -0,0 +1,27 @@
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# ===================================================================
+# === BOUNDED STREAMING EXECUTOR ===
+# ===================================================================
+# Submitting one future per input row up front keeps every row (and every
+# future) in memory at once. stream_map pulls items from an iterator only as
+# fast as the workers finish them, so memory stays flat however long the input.
+
+def stream_map(func, items, max_workers, max_in_flight=None):
+    """
+    Yield (item, func(item)) in completion order. At most max_in_flight items
+    (default 4 × max_workers) are submitted but not yet yielded at any time;
+    the next item is read from `items` only when a slot frees up.
+    """
+    max_in_flight = max_in_flight or 4 * max_workers
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(func, item): item for item in islice(items, max_in_flight)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                for next_item in islice(items, 1):
+                    pending[executor.submit(func, next_item)] = next_item
+                yield item, future.result()
@@ -0,0 +1,178 @@
+import os
+import csv
+import time
+import socket
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import pandas as pd
+import tldextract
+
+# === CONFIGURATION ===
+# One cache shared by every stage that validates websites
+DNS_CACHE_PATH = "C:/Users/myuan/Desktop/VetMap_Data/dns_cache.csv"
+POSITIVE_TTL_SECONDS = 30 * 24 * 3600  # hosts that resolved are trusted for 30 days
+NEGATIVE_TTL_SECONDS = 24 * 3600       # dead hosts are retried after a day
+DNS_TIMEOUT_SECONDS = 3.0
+MAX_CONCURRENT_LOOKUPS = 64
+# getaddrinfo errors meaning the host does not exist (NXDOMAIN); any other failure is not proof of a dead host
+NXDOMAIN_ERRNOS = {socket.EAI_NONAME, getattr(socket, "EAI_NODATA", socket.EAI_NONAME)}
+
+non_html_extensions = (
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp",
+    ".pdf", ".doc", ".docx", ".xls", ".xlsx",
+    ".zip", ".rar", ".mp4", ".mp3", ".avi", ".mov"
+)
+
+# ===================================================================
+# === DNS CACHE ===
+# ===================================================================
+
+class DNSCache:
+    """
+    Hostname → (resolves, checked_at), appended to a CSV as lookups finish (the
+    newest record per host wins). The file is never rewritten, so processes
+    sharing it (2_Multi_Country_Cleaning.py workers, 3_Web_Finding.py) cannot
+    drop each other's entries. Entries expire after POSITIVE_TTL_SECONDS or
+    NEGATIVE_TTL_SECONDS; lookups that timed out are never stored, so a slow
+    resolver does not mark a host as dead.
+    """
+    fields = ["hostname", "resolves", "checked_at"]
+
+    def __init__(self, path=DNS_CACHE_PATH):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.entries = self._read(path)
+            print(f"📇 Loaded {len(self.entries)} cached DNS results from {path}")
+
+    @staticmethod
+    def _read(path):
+        entries = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                entry = (row["resolves"] == "1", float(row["checked_at"]))
+                if row["hostname"] not in entries or entry[1] >= entries[row["hostname"]][1]:
+                    entries[row["hostname"]] = entry
+        return entries
+
+    def get(self, hostname, now=None):
+        """True/False for a fresh entry, None if unknown or expired."""
+        entry = self.entries.get(hostname)
+        if entry is None:
+            return None
+        resolves, checked_at = entry
+        ttl = POSITIVE_TTL_SECONDS if resolves else NEGATIVE_TTL_SECONDS
+        if (now or time.time()) - checked_at > ttl:
+            return None
+        return resolves
+
+    def update(self, results, now=None):
+        """Record {hostname: resolves} and append it to the CSV in one write."""
+        now = now or time.time()
+        with self.lock:
+            for hostname, resolves in results.items():
+                self.entries[hostname] = (resolves, now)
+            if not self.path or not results:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if f.tell() == 0:
+                    writer.writerow(self.fields)
+                writer.writerows([hostname, int(resolves), now] for hostname, resolves in results.items())
+
+# ===================================================================
+# === ASYNC RESOLUTION ===
+# ===================================================================
+
+async def _resolve_one(loop, hostname, semaphore, timeout):
+    async with semaphore:
+        try:
+            await asyncio.wait_for(loop.getaddrinfo(hostname, None), timeout)
+            return hostname, True
+        except asyncio.TimeoutError:
+            return hostname, None  # unknown: failed this run, not cached
+        except socket.gaierror as e:
+            # EAI_AGAIN, EAI_FAIL, unreachable resolver, no network: unknown as well
+            return hostname, (False if e.errno in NXDOMAIN_ERRNOS else None)
+        except UnicodeError:
+            return hostname, False  # not a valid hostname
+        except OSError:
+            return hostname, None
+
+async def _resolve_all(hostnames, timeout, max_concurrent):
+    loop = asyncio.get_running_loop()
+    # getaddrinfo runs in the default executor; size it to the lookup concurrency
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=max_concurrent))
+    semaphore = asyncio.Semaphore(max_concurrent)
+    return await asyncio.gather(*(_resolve_one(loop, h, semaphore, timeout) for h in hostnames))
+
+def resolve_hostnames(hostnames, cache=None, timeout=DNS_TIMEOUT_SECONDS, max_concurrent=MAX_CONCURRENT_LOOKUPS):
+    """
+    Return {hostname: True/False/None} telling whether each hostname resolves;
+    None when the lookup failed without an answer (timeout, resolver error).
+    Fresh cache entries are used as is; the rest are looked up concurrently.
+    """
+    hostnames = set(hostnames)
+    results = {}
+    if cache is not None:
+        for hostname in hostnames:
+            cached = cache.get(hostname)
+            if cached is not None:
+                results[hostname] = cached
+    pending = sorted(hostnames - results.keys())
+    if pending:
+        print(f"🌐 Resolving {len(pending)} hostnames ({len(results)} from cache)")
+        resolved = asyncio.run(_resolve_all(pending, timeout, max_concurrent))
+        if cache is not None:
+            cache.update({h: ok for h, ok in resolved if ok is not None})
+        results.update(dict(resolved))
+    return results
+
+# ===================================================================
+# === URL CLEANING ===
+# ===================================================================
+
+def _parse_url(url, country_tld):
+    """
+    Cleaned URL without the DNS check, plus its hostname: None for malformed or
+    foreign-ccTLD URLs, the homepage for links to downloadable files.
+    """
+    parsed = urlparse(url)
+    hostname = parsed.hostname
+    if not hostname:
+        return None, None
+    last_suffix = tldextract.extract(hostname).suffix.split(".")[-1]
+    if len(last_suffix) == 2 and last_suffix != country_tld:
+        return None, None  # Foreign ccTLD
+    if (parsed.path + parsed.query).endswith(non_html_extensions):
+        return f"{parsed.scheme}://{hostname}/", hostname
+    return url, hostname
+
+def clean_urls(urls, country_tld, cache=None):
+    """
+    Validate and normalize a whole Series of website URLs. Each distinct URL is
+    parsed once and each distinct hostname resolved once (through the cache);
+    URLs that are empty, not http(s), foreign ccTLD or do not resolve become None.
+    URLs whose lookup gave no answer (timeout, resolver or network error) are kept.
+    """
+    urls = pd.Series(urls)
+    text = urls.where(urls.notna()).astype("string").str.strip().str.lower()
+    candidates = text[text.str.startswith(("http://", "https://")).fillna(False).astype(bool)]
+
+    parsed = {}
+    for url in candidates.unique():
+        try:
+            parsed[url] = _parse_url(url, country_tld)
+        except Exception:
+            parsed[url] = (None, None)
+
+    resolves = resolve_hostnames({h for _, h in parsed.values() if h}, cache)
+    cleaned = {
+        url: (clean if clean and resolves.get(hostname) is not False else None)
+        for url, (clean, hostname) in parsed.items()
+    }
+    return candidates.map(cleaned).reindex(urls.index).astype(object).where(lambda s: s.notna(), None)
@@ -0,0 +1,61 @@
+import os
+import re
+import csv
+import time
+import threading
+import pandas as pd
+from keyword_matcher import normalize_text
+
+# === CONFIGURATION ===
+# Shared by 3_Web_Finding.py and 3_Web_Luckybtn.py and across countries (cross-border chains)
+WEBSITE_CACHE_PATH = "C:/Users/myuan/Desktop/VetMap_Data/website_cache.csv"
+NEGATIVE_RETRY_DAYS = 30  # practices without a usable result are searched again after this
+
+def practice_key(name, address, country):
+    """Accent, case and punctuation folded 'name|address|country'."""
+    parts = (re.sub(r"[^a-z0-9]+", " ", normalize_text(v if pd.notna(v) else "")).strip()
+             for v in (name, address, country))
+    return "|".join(parts)
+
+class WebsiteCache:
+    """
+    Practice identity → chosen website, appended to a CSV as results arrive
+    (the last record per key wins). Found URLs are kept for good; practices
+    whose search gave no usable URL are stored with an empty url and a
+    retry_after time, and count as unknown again once it has passed.
+    """
+    fields = ["key", "url", "engine", "checked_at", "retry_after"]
+
+    def __init__(self, path=WEBSITE_CACHE_PATH):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    self.entries[row["key"]] = (row["url"] or None, row["engine"],
+                                                float(row["checked_at"]), float(row["retry_after"] or 0))
+            print(f"📇 Loaded {len(self.entries)} cached website searches from {path}")
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(self.fields)
+
+    def get(self, name, address, country, now=None):
+        """(url, engine) for a known practice (url None = not found, not due again yet); None if unknown or expired."""
+        entry = self.entries.get(practice_key(name, address, country))
+        if entry is None:
+            return None
+        url, engine, _, retry_after = entry
+        if url is None and (now or time.time()) >= retry_after:
+            return None
+        return url, engine
+
+    def put(self, name, address, country, url, engine, now=None):
+        now = now or time.time()
+        key = practice_key(name, address, country)
+        retry_after = "" if url else now + NEGATIVE_RETRY_DAYS * 24 * 3600
+        with self.lock:
+            self.entries[key] = (url or None, engine, now, float(retry_after or 0))
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow([key, url or "", engine, now, retry_after])
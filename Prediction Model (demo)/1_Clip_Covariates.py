@@ -1,8 +1,11 @@
-import geopandas as gpd
 import rioxarray
 import rasterio
 import numpy as np
 import os
+import sys
+# Shared country boundaries live in boundary_store.py at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from boundary_store import get_country_boundary
 
 # === INPUTS ===
 BASE_DIR = "C:/Users/myuan/Desktop/Data/Covariates"
@@ -10,10 +13,10 @@ SHP_DIR = "C:/Users/myuan/Desktop/Data/shapefile/country"
 RASTER_CLIP_DIR = os.path.join(BASE_DIR, "clipped_rasters")
 os.makedirs(RASTER_CLIP_DIR, exist_ok=True)
 
-shapefiles = {
-    "CHE": os.path.join(SHP_DIR, "CHE/CHE1_nr.shp"),  # Switzerland shapefile
-    "AUT": os.path.join(SHP_DIR, "AUT/AUT1_nr.shp")   # Austria shapefile
-}
+countries = [
+    "CHE",  # Switzerland (SHP_DIR/CHE/CHE1_nr.shp)
+    "AUT"   # Austria (SHP_DIR/AUT/AUT1_nr.shp)
+]
 
 rasters = [
     os.path.join(BASE_DIR, "ca_v4.tif"),
@@ -28,11 +31,9 @@ rasters = [
 ]
 
 # === LOOP OVER COUNTRIES & RASTERS ===
-for country_name, shp_path in shapefiles.items():
-    # Load shapefile and merge polygons
-    country = gpd.read_file(shp_path)
-    country_union = country.union_all()
-    country = gpd.GeoDataFrame(geometry=[country_union], crs=country.crs)
+for country_name in countries:
+    # Merged country polygon from the shared boundary store
+    country = get_country_boundary(country_name, SHP_DIR).to_gdf()
 
     for raster_path in rasters:
         raster_name = os.path.splitext(os.path.basename(raster_path))[0]
@@ -3,13 +3,14 @@ import pandas as pd
 from shapely.geometry import box
 import numpy as np
 import os
+import sys
+# Shared country boundaries live in boundary_store.py at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from boundary_store import get_country_boundary
 
 # === INPUTS ===
 SHP_DIR = "C:/Users/myuan/Desktop/Data/shapefile/country"
-shapefiles = {
-    "CHE": os.path.join(SHP_DIR, "CHE/CHE1_nr.shp"),
-    "AUT": os.path.join(SHP_DIR, "AUT/AUT1_nr.shp")
-}
+countries = ["CHE", "AUT"]
 
 GRID_DIR = "C:/Users/myuan/Desktop/Data/Covariates/grids"
 os.makedirs(GRID_DIR, exist_ok=True)
@@ -49,10 +50,8 @@ def make_grid(boundary_gdf, country_code, GRID_DIR):
 
 # === LOOP OVER COUNTRIES ===
 country_grids = []
-for code, shp_path in shapefiles.items():
-    country = gpd.read_file(shp_path)
-    country_union = country.union_all()
-    boundary_gdf = gpd.GeoDataFrame(geometry=[country_union], crs=country.crs)
+for code in countries:
+    boundary_gdf = get_country_boundary(code, SHP_DIR).to_gdf()
 
     grid_clipped = make_grid(boundary_gdf, code, GRID_DIR)
     country_grids.append(grid_clipped)
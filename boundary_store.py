@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import time
+from functools import lru_cache
+import numpy as np
+import geopandas as gpd
+import shapely
+from pyproj import Transformer
+
+# === CONFIGURATION ===
+SHP_DIR = "C:/Users/myuan/Desktop/Data/shapefile/country"
+SIMPLIFY_TOLERANCE_DEG = 0.01  # ~1 km, used for the simplified variant
+METERS_PER_DEGREE = 111320
+BAND_MARGIN = 1.5  # band half-width in simplify tolerances; > 1 absorbs buffer arc approximation
+
+# ===================================================================
+# === COUNTRY BOUNDARY STORE ===
+# ===================================================================
+# Each <ISO>1_nr.shp is read and unioned once, then kept next to the shapefiles as
+# WKB (full detail + simplified) with a small JSON of bounds and source mtime.
+# Later calls in any stage load the WKB, and repeated calls in one process are memoized.
+
+class CountryBoundary:
+    """
+    Unioned country boundary in EPSG:4326. `geometry` and `simplified` are
+    prepared, so repeated contains/within/intersects calls are fast.
+    """
+    def __init__(self, iso, geometry, simplified, tolerance):
+        self.iso = iso
+        self.geometry = geometry
+        self.simplified = simplified
+        self.tolerance = tolerance
+        self.bounds = geometry.bounds
+        shapely.prepare(self.geometry)
+        shapely.prepare(self.simplified)
+        self._bands = {}
+        self._metric = None
+
+    def to_gdf(self, simplified=False):
+        geom = self.simplified if simplified else self.geometry
+        return gpd.GeoDataFrame({"ISO": [self.iso]}, geometry=[geom], crs="EPSG:4326")
+
+    def _band(self, buffer_deg):
+        """
+        (inner, outer) polygons around the border, from the simplified geometry.
+        The simplified outline is never more than `tolerance` away from the exact
+        one, so with a band of BAND_MARGIN tolerances inner lies inside the
+        country and outer contains the country grown by buffer_deg. Only points
+        between the two need the exact test.
+        """
+        if buffer_deg not in self._bands:
+            band = BAND_MARGIN * self.tolerance
+            inner = shapely.buffer(self.simplified, -band)
+            outer = shapely.buffer(self.simplified, band + buffer_deg)
+            shapely.prepare(inner)
+            shapely.prepare(outer)
+            self._bands[buffer_deg] = (inner, outer)
+        return self._bands[buffer_deg]
+
+    def _projected(self):
+        """Exact geometry in the country's UTM zone (meters) and the transformer to it, built once."""
+        if self._metric is None:
+            # Long straight edges in degrees are curves in meters: add vertices every ~500 m first
+            gdf = gpd.GeoDataFrame({"ISO": [self.iso]}, geometry=[shapely.segmentize(self.geometry, 0.005)], crs="EPSG:4326")
+            crs = gdf.estimate_utm_crs()
+            geometry = gdf.to_crs(crs).geometry.iloc[0]
+            shapely.prepare(geometry)
+            self._metric = (geometry, Transformer.from_crs("EPSG:4326", crs, always_xy=True))
+        return self._metric
+
+    def contains_points(self, lons, lats, buffer_m=0):
+        """
+        Boolean array: which (lon, lat) points lie inside the country, or within
+        buffer_m of it. Works in three stages on coordinate arrays: bounding box,
+        then the simplified band, then the exact geometry only for points near
+        the border. Missing coordinates count as outside.
+        """
+        x = np.asarray(lons, dtype=float)
+        y = np.asarray(lats, dtype=float)
+        inside = np.zeros(len(x), dtype=bool)
+
+        # Degrees of longitude per meter grow with latitude; the widest case makes the
+        # bbox and band prefilters supersets of the buffer in every direction
+        max_lat = min(max(abs(self.bounds[1]), abs(self.bounds[3])), 89.0)
+        buffer_deg = buffer_m / (METERS_PER_DEGREE * np.cos(np.radians(max_lat))) if buffer_m else 0.0
+        minx, miny, maxx, maxy = self.bounds
+        margin = buffer_deg + BAND_MARGIN * self.tolerance
+        candidates = np.flatnonzero(
+            (x >= minx - margin) & (x <= maxx + margin) & (y >= miny - margin) & (y <= maxy + margin)
+        )
+
+        inner, outer = self._band(buffer_deg)
+        cx, cy = x[candidates], y[candidates]
+        surely_inside = shapely.contains_xy(inner, cx, cy)
+        near_border = ~surely_inside & shapely.contains_xy(outer, cx, cy)
+        inside[candidates[surely_inside]] = True
+
+        bx, by = cx[near_border], cy[near_border]
+        if buffer_deg:
+            # Distance measured in meters (UTM), so the buffer is buffer_m in every direction
+            geometry, transformer = self._projected()
+            px, py = transformer.transform(bx, by)
+            exact = shapely.dwithin(geometry, shapely.points(px, py), buffer_m)
+        else:
+            exact = shapely.contains_xy(self.geometry, bx, by)
+        inside[candidates[near_border][exact]] = True
+        return inside
+
+def shapefile_path(iso, shp_dir=SHP_DIR):
+    return os.path.join(shp_dir, iso, f"{iso}1_nr.shp")
+
+def _cache_paths(iso, cache_dir):
+    return (
+        os.path.join(cache_dir, f"{iso}_boundary.wkb"),
+        os.path.join(cache_dir, f"{iso}_boundary_simplified.wkb"),
+        os.path.join(cache_dir, f"{iso}_boundary.json"),
+    )
+
+def _load_cached(iso, shp_path, cache_dir, tolerance):
+    full_path, simple_path, meta_path = _cache_paths(iso, cache_dir)
+    if not all(os.path.exists(p) for p in (full_path, simple_path, meta_path)):
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("source_mtime") != os.path.getmtime(shp_path) or meta.get("tolerance") != tolerance:
+        return None  # shapefile changed or different simplification → rebuild
+    with open(full_path, "rb") as f:
+        geometry = shapely.from_wkb(f.read())
+    with open(simple_path, "rb") as f:
+        simplified = shapely.from_wkb(f.read())
+    return CountryBoundary(iso, geometry, simplified, tolerance)
+
+def _build(iso, shp_path, cache_dir, tolerance):
+    print(f"🗺️ Building boundary store entry for {iso} from {shp_path}")
+    geometry = gpd.read_file(shp_path).to_crs(epsg=4326).geometry.union_all()
+    simplified = shapely.simplify(geometry, tolerance, preserve_topology=True)
+
+    full_path, simple_path, meta_path = _cache_paths(iso, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(full_path, "wb") as f:
+        f.write(shapely.to_wkb(geometry))
+    with open(simple_path, "wb") as f:
+        f.write(shapely.to_wkb(simplified))
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "iso": iso,
+            "bounds": list(geometry.bounds),
+            "tolerance": tolerance,
+            "source_mtime": os.path.getmtime(shp_path),
+        }, f)
+    return CountryBoundary(iso, geometry, simplified, tolerance)
+
+@lru_cache(maxsize=None)
+def get_country_boundary(iso, shp_dir=SHP_DIR, cache_dir=None, tolerance=SIMPLIFY_TOLERANCE_DEG):
+    """
+    Return the CountryBoundary for an ISO3 code. Raises FileNotFoundError if
+    the country has no <ISO>1_nr.shp in shp_dir.
+    """
+    shp_path = shapefile_path(iso, shp_dir)
+    if not os.path.exists(shp_path):
+        raise FileNotFoundError(f"No shapefile for {iso}: {shp_path}")
+    cache_dir = cache_dir or os.path.join(shp_dir, "_boundary_cache")
+    boundary = _load_cached(iso, shp_path, cache_dir, tolerance)
+    if boundary is None:
+        boundary = _build(iso, shp_path, cache_dir, tolerance)
+    return boundary
+
+# ===================================================================
+# === BENCHMARK ===
+# ===================================================================
+
+def benchmark(iso, n_points=200_000, shp_dir=SHP_DIR, seed=0):
+    """Point-in-country test on random points in the bounding box: Point list + within vs contains_points."""
+    from shapely.geometry import Point
+
+    boundary = get_country_boundary(iso, shp_dir)
+    rng = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = boundary.bounds
+    lons = rng.uniform(minx - 0.5, maxx + 0.5, n_points)
+    lats = rng.uniform(miny - 0.5, maxy + 0.5, n_points)
+    print(f"📊 {iso}: {n_points} random points around the border")
+
+    start = time.perf_counter()
+    gdf = gpd.GeoDataFrame(geometry=[Point(xy) for xy in zip(lons, lats)], crs="EPSG:4326")
+    old = gdf.geometry.within(boundary.geometry).to_numpy()
+    print(f"⏱️ Point list + within: {time.perf_counter() - start:.2f}s → {old.sum()} inside")
+
+    start = time.perf_counter()
+    new = boundary.contains_points(lons, lats)
+    print(f"⏱️ contains_points: {time.perf_counter() - start:.2f}s → {new.sum()} inside")
+    print("✅ Results match" if np.array_equal(old, new) else f"⚠️ {np.sum(old != new)} points differ")
+
+    start = time.perf_counter()
+    buffered = boundary.contains_points(lons, lats, buffer_m=100)
+    print(f"⏱️ contains_points, 100 m buffer: {time.perf_counter() - start:.2f}s → {buffered.sum()} inside")
+
+if __name__ == "__main__":
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else "CHE")
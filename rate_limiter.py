@@ -0,0 +1,35 @@
+import time
+import threading
+
+# ===================================================================
+# === SHARED RATE LIMITER ===
+# ===================================================================
+# Used by the Nominatim lookups of Data Collection/address_fill.py and
+# Data Preprocessing/geocoding.py, and by the SearXNG backend of search_backends.py.
+
+class RateLimiter:
+    """
+    Request budget shared by all threads: hands out evenly spaced time slots so
+    the rate never exceeds `rate` requests per second.
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / max(rate, 0.01)
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take the next slot only if it is already due."""
+        with self.lock:
+            now = time.monotonic()
+            if self.next_slot > now:
+                return False
+            self.next_slot = now + self.interval
+            return True
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)